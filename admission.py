@@ -0,0 +1,249 @@
+"""
+Admission control for the test endpoints.
+
+Every limited request first takes a slot from a global concurrency gate and
+then a token from a per-session and a per-IP token bucket. Requests that are
+not admitted are answered at once (503 or 429 with Retry-After) instead of
+queuing behind busy workers. Submissions can use the whole gate, while new
+test starts are refused once only the reserved share of slots is left, so
+load is shed from starts first.
+
+Buckets and gate slots live in a store shared by all workers of a host
+(SQLite), or in process memory for development. Per-IP buckets key on
+request.remote_addr, which is the client's only when the app trusts the
+X-Forwarded-For header of its proxies (TRUSTED_PROXIES in app.py).
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from flask import g, jsonify, request, session
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket refilled at per_minute tokens a minute, holding at most burst tokens"""
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+# Limits per endpoint and bucket scope ('session' or 'ip')
+DEFAULT_LIMITS: Dict[str, Dict[str, RateLimit]] = {
+    'start_test': {'session': RateLimit(5, 5), 'ip': RateLimit(60, 30)},
+    'start_adaptive': {'session': RateLimit(5, 5), 'ip': RateLimit(60, 30)},
+    'start_exam': {'session': RateLimit(3, 3), 'ip': RateLimit(30, 15)},
+    'exam_section': {'session': RateLimit(30, 10), 'ip': RateLimit(600, 100)},
+    'submit_test': {'session': RateLimit(60, 20), 'ip': RateLimit(600, 200)},
+    'autosave': {'session': RateLimit(60, 20), 'ip': RateLimit(1200, 300)},
+    'adaptive_answer': {'session': RateLimit(120, 30), 'ip': RateLimit(1200, 300)},
+    'score_form': {'ip': RateLimit(600, 200)},
+    'campaign_link': {'ip': RateLimit(60, 30)}
+}
+
+# Endpoints that finish a test already in progress; they are shed last
+PRIORITY_ENDPOINTS = {'submit_test', 'autosave', 'adaptive_answer', 'score_form'}
+
+# Buckets idle for this long are dropped
+IDLE_SECONDS = 3600
+
+
+class MemoryStore:
+    """Per-process store; limits then apply to each worker separately"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._slots: Dict[str, float] = {}
+
+    def take(self, key: str, limit: RateLimit, now: float) -> float:
+        """Takes one token; returns 0 when admitted, otherwise seconds until a token is available"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 100000:
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < IDLE_SECONDS}
+            return (1 - tokens) / limit.rate
+
+    def acquire_slot(self, limit: int, lease_seconds: float, now: float) -> Optional[str]:
+        with self._lock:
+            self._slots = {k: v for k, v in self._slots.items() if v > now}
+            if len(self._slots) >= limit:
+                return None
+            token = uuid.uuid4().hex
+            self._slots[token] = now + lease_seconds
+            return token
+
+    def release_slot(self, token: str):
+        with self._lock:
+            self._slots.pop(token, None)
+
+
+class SQLiteStore:
+    """
+    Store shared by all worker processes on a host.
+    Gate slots are leases, so a crashed worker cannot hold a slot forever.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS slots (token TEXT PRIMARY KEY, expires REAL)')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=0.5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, limit: RateLimit, now: float) -> float:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (limit.burst, now)
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / limit.rate
+            if not wait:
+                tokens -= 1
+            conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens, now))
+            if random.random() < 0.001:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - IDLE_SECONDS,))
+            conn.execute('COMMIT')
+            return wait
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def acquire_slot(self, limit: int, lease_seconds: float, now: float) -> Optional[str]:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM slots WHERE expires <= ?', (now,))
+            (in_flight,) = conn.execute('SELECT COUNT(*) FROM slots').fetchone()
+            token = None
+            if in_flight < limit:
+                token = uuid.uuid4().hex
+                conn.execute('INSERT INTO slots (token, expires) VALUES (?, ?)', (token, now + lease_seconds))
+            conn.execute('COMMIT')
+            return token
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def release_slot(self, token: str):
+        self._connection().execute('DELETE FROM slots WHERE token = ?', (token,))
+
+
+def _too_many(status: int, message: str, retry_after: float):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class AdmissionController:
+    """
+    Flask extension applying the concurrency gate and token buckets to the
+    endpoints listed in limits.
+    """
+
+    def __init__(self, store, limits: Dict[str, Dict[str, RateLimit]] = None,
+                 max_concurrent: int = 32, reserved_for_priority: int = 8,
+                 lease_seconds: float = 30.0):
+        self.store = store
+        self.limits = DEFAULT_LIMITS if limits is None else limits
+        self.max_concurrent = max_concurrent
+        self.reserved_for_priority = reserved_for_priority
+        self.lease_seconds = lease_seconds
+
+    def init_app(self, app):
+        app.before_request(self.admit)
+        app.teardown_request(self.release)
+
+    def admit(self):
+        limits = self.limits.get(request.endpoint)
+        if limits is None:
+            return None
+        now = time.time()
+
+        # Storage trouble must never take the site down, so the store fails open
+        try:
+            gate = self.max_concurrent
+            if request.endpoint not in PRIORITY_ENDPOINTS:
+                gate -= self.reserved_for_priority
+            token = self.store.acquire_slot(gate, self.lease_seconds, now)
+            if token is None:
+                return _too_many(503, 'Server busy, please retry shortly', 1)
+            g.admission_slot = token
+
+            if 'sid' not in session:
+                session['sid'] = uuid.uuid4().hex
+            keys = {'session': session['sid'], 'ip': request.remote_addr or 'unknown'}
+            wait = max((
+                self.store.take(f"{request.endpoint}:{scope}:{keys[scope]}", limit, now)
+                for scope, limit in limits.items()
+            ), default=0)
+        except sqlite3.Error:
+            return None
+
+        if wait:
+            self.release()
+            return _too_many(429, 'Too many requests', wait)
+        return None
+
+    def release(self, exc=None):
+        token = g.pop('admission_slot', None)
+        if token is not None:
+            try:
+                self.store.release_slot(token)
+            except sqlite3.Error:
+                pass
+
+
+def load_limits(overrides: Optional[str]) -> Dict[str, Dict[str, RateLimit]]:
+    """
+    Default limits with per-route overrides from JSON such as
+    {"start_test": {"session": [5, 5], "ip": [120, 60]}} (per minute, burst).
+    A null scope or route removes the limit.
+    """
+    limits = {endpoint: dict(scopes) for endpoint, scopes in DEFAULT_LIMITS.items()}
+    for endpoint, scopes in json.loads(overrides or '{}').items():
+        if scopes is None:
+            limits.pop(endpoint, None)
+            continue
+        for scope, value in scopes.items():
+            if value is None:
+                limits.setdefault(endpoint, {}).pop(scope, None)
+            else:
+                limits.setdefault(endpoint, {})[scope] = RateLimit(*value)
+    return limits
+
+
+def create_store(spec: str):
+    """'memory' for a per-process store, otherwise the path of a shared SQLite file"""
+    if spec == 'memory':
+        return MemoryStore()
+    return SQLiteStore(spec)
@@ -1,21 +1,49 @@
 import sys
 sys.dont_write_bytecode = True
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, abort, g
+from werkzeug.middleware.proxy_fix import ProxyFix
 import random
 import datetime
+import hashlib
+import hmac
 import json
 import os
+import secrets
+import sqlite3
+import atexit
+import click
+import csv
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 
 # Import our new question modules
 from questions.verbal import VerbalQuestions
 from questions.numerical import NumericalQuestions
 from questions.diagrammatical import DiagrammaticQuestions
+from questions.adaptive import AdaptiveItemBank, AdaptiveSession
+from questions.matrix_generator import get_matrix_store
+from questions.bank import DEFAULT_BANK, Bank, BankRegistry
+from questions.records import GENERATED_BASE, ItemKey, ItemRecord, ItemRef, ItemTable
+from questions.rng import RandomStreams
+from static_export import FormKeys, export_bundles
+from admission import AdmissionController, create_store, load_limits
+from telemetry import TimingHistograms, is_fast_guess, merge_timing_events
+from campaigns import CampaignStore, pregenerate, read_candidates
+from results import FORMATS, ResultStore, encode_stream, export_lines, item_details
+from progress import ProgressStore
+from tenants import Tenant, TenantRegistry
 
 app = Flask(__name__)
-app.secret_key = 'your-secret-key-here'  # Replace with secure key in production
+# Signs the session cookie, which binds a browser to its candidate and tests; all workers need the same key
+app.secret_key = os.environ.get('SECRET_KEY')
+if not app.secret_key:
+    raise RuntimeError('Set SECRET_KEY to a long random value shared by all workers')
 
 # Load translations
 def load_translations():
@@ -30,105 +58,254 @@ def load_translations():
 
 TRANSLATIONS = load_translations()
 
+# Section time limit in seconds, shared with the timer in test.html
+SECTION_TIME_LIMIT = 5 * 60
+# Autosaved answers are still accepted this long after the section time limit
+AUTOSAVE_GRACE_SECONDS = 30
+# Submissions queued on a candidate's device while offline are accepted this long after the time limit
+LATE_SUBMISSION_SECONDS = 24 * 3600
+
+# Answer keys of statically exported forms (see static_export.py)
+FORM_KEYS = FormKeys(os.environ.get('FORM_KEYS_PATH',
+                                    os.path.join(os.path.dirname(__file__), 'instance', 'form_keys.json')))
+# Origin allowed to post to /score_form when forms are served from a CDN
+STATIC_ORIGIN = os.environ.get('STATIC_ORIGIN', '*')
+
+# Third-party assets of every page; the service worker (templates/sw.js) precaches them
+CDN_ASSETS = {
+    'tailwind': 'https://cdnjs.cloudflare.com/ajax/libs/tailwindcss/2.2.19/tailwind.min.css',
+    'jquery': 'https://cdnjs.cloudflare.com/ajax/libs/jquery/3.6.0/jquery.min.js'
+}
+
+def load_shell_version() -> str:
+    """Hash of the files pages are built from; names the service worker's caches"""
+    digest = hashlib.sha256(json.dumps(CDN_ASSETS, sort_keys=True).encode('utf-8'))
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for folder in ('templates', 'static', 'translations'):
+        for dirpath, dirnames, filenames in sorted(os.walk(os.path.join(base_dir, folder))):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, base_dir).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+SHELL_VERSION = load_shell_version()
+
+@app.context_processor
+def inject_shell():
+    return {'cdn_assets': CDN_ASSETS, 'shell_version': SHELL_VERSION}
+
+# Reverse proxies in front of the app (1 on Render). Their X-Forwarded-For header gives the client
+# address the per-IP buckets key on; without it every client would share the proxy's bucket.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
+# Admission control on the test endpoints, shared by all workers through ADMISSION_STORE
+admission = AdmissionController(
+    create_store(os.environ.get('ADMISSION_STORE',
+                                os.path.join(os.path.dirname(__file__), 'instance', 'admission.sqlite3'))),
+    limits=load_limits(os.environ.get('RATE_LIMITS')),
+    max_concurrent=int(os.environ.get('MAX_CONCURRENT_REQUESTS', 32)),
+    reserved_for_priority=int(os.environ.get('RESERVED_SUBMIT_SLOTS', 8))
+)
+admission.init_app(app)
+
+# Per-item response-time histograms fed by the test page's timing telemetry
+timing_histograms = TimingHistograms(os.environ.get(
+    'TELEMETRY_STORE', os.path.join(os.path.dirname(__file__), 'instance', 'telemetry.sqlite3')))
+atexit.register(timing_histograms.flush)
+
+# Published versions of the item banks; workers pick up a new version between requests
+BANKS = BankRegistry(os.environ.get('BANK_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'banks')),
+                     DEFAULT_BANK)
+
+# Client companies with their own item overlays, resolved per request by host or /t/<tenant>/
+TENANTS = TenantRegistry(os.environ.get(
+    'TENANTS_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'tenants')), BANKS.current)
+TENANTS.init_app(app)
+# A new bank version is only used when every tenant overlay still applies to it
+BANKS.validators.append(TENANTS.validate)
+
+# Independent random stream for each request, spawned from RNG_SEED (fresh entropy when unset)
+RANDOM_STREAMS = RandomStreams(int(os.environ['RNG_SEED']) if os.environ.get('RNG_SEED') else None)
+
+# Finished sections, kept for exports
+RESULTS = ResultStore(os.environ.get(
+    'RESULTS_STORE', os.path.join(os.path.dirname(__file__), 'instance', 'results.sqlite3')))
+# Tests in progress with their autosaved answers, kept until no submission for them is accepted any more
+PROGRESS = ProgressStore(os.environ.get(
+    'PROGRESS_STORE', os.path.join(os.path.dirname(__file__), 'instance', 'progress.sqlite3')),
+    keep_seconds=SECTION_TIME_LIMIT + AUTOSAVE_GRACE_SECONDS + LATE_SUBMISSION_SECONDS)
+# Bearer token required by the results export endpoint; the endpoint is off without one
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN')
+
+# Candidate campaigns with forms prepared ahead of time
+CAMPAIGNS = CampaignStore(os.environ.get(
+    'CAMPAIGN_STORE', os.path.join(os.path.dirname(__file__), 'instance', 'campaigns.sqlite3')))
+
 @dataclass
 class Question:
     question_text: str
     options: List[str]
     correct_answer: str
-    explanation: str
     matrix_data: Dict = None
+    item_id: str = None
+    # Parameter of generated items (the start of a numerical sequence) needed to rebuild them
+    variant: int = None
 
-    def to_dict(self):
-        """Convert question to dictionary format for session storage"""
+    def to_client_dict(self):
+        """Convert question to the dictionary sent to the browser (no answer key)"""
         data = {
             'question_text': self.question_text,
-            'options': self.options,
-            'correct_answer': self.correct_answer,
-            'explanation': self.explanation
+            'options': self.options
         }
         if self.matrix_data:
             data['matrix_data'] = self.matrix_data
         return data
 
+# Item tables, built once per bank version (and tenant) and shared by all languages.
+# Every bank reload and tenant edit makes new keys, so only the most recently used are kept.
+ITEM_TABLES: 'OrderedDict[Tuple, ItemTable]' = OrderedDict()
+ITEM_TABLE_LIMIT = 64
+CACHE_LOCK = threading.Lock()
+
+def cached(cache: OrderedDict, limit: int, key: Tuple, build):
+    """The entry of a bounded LRU cache, built with build() when missing"""
+    with CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+    value = build()
+    with CACHE_LOCK:
+        cache[key] = value
+        while len(cache) > limit:
+            cache.popitem(last=False)
+    return value
+
+def get_item_table(bank: Bank, tenant: Tenant = None) -> ItemTable:
+    key = (bank.version,) + ((tenant.name, tenant.version) if tenant else ())
+    return cached(ITEM_TABLES, ITEM_TABLE_LIMIT, key,
+                  lambda: ItemTable(bank, tenant.view(bank) if tenant else None))
+
 class TestManager:
     """
     Manages test generation and handles different question types and languages.
+    Tests are drawn from rng as compact item references (see questions/records.py)
+    and only built into questions for rendering.
     """
-    def __init__(self, lang='en'):
+    def __init__(self, lang='en', tenant: Tenant = None, bank: Bank = None, rng: random.Random = None):
         self.lang = lang
-        # Initialize question banks based on language
-        self.questions = {
-            'verbal': VerbalQuestions.QUESTIONS[lang],
-            'numerical': NumericalQuestions.QUESTIONS[lang],
-            'diagrammatic': DiagrammaticQuestions.QUESTIONS[lang]
-        }
+        # Question banks are language-neutral; text is resolved per language when building questions
+        self.bank = bank or BANKS.current
+        # Text is resolved through the strings of the test's bank version
+        self.strings = self.bank.strings
+        if tenant is not None:
+            # Tenants see the stock banks through their overlay (the item table) and their own strings
+            self.strings = tenant.strings_for(self.bank)
+        self.tenant = tenant
+        self.table = get_item_table(self.bank, tenant)
+        # Managers that only build or score questions draw nothing and may go without a stream
+        self.rng = rng or random.Random()
 
-    def generate_verbal_question(self) -> Question:
-        """Generate a verbal reasoning question"""
+    def draw_verbal_item(self) -> ItemRef:
+        """Pick a verbal reasoning item"""
         # Randomly choose between relationships and analogies
-        question_type = random.choice(['relationships', 'analogies'])
-        question_bank = self.questions['verbal'][question_type]
-        
-        # Select a random question from the bank
-        question_data = random.choice(question_bank)
+        question_type = self.rng.choice(['relationships', 'analogies'])
+        return ItemRef(self.rng.choice(self.table.pools[('verbal', question_type)]))
+
+    def draw_numerical_item(self) -> ItemRef:
+        """Pick a numerical sequence pattern and the variant it is asked in"""
+        return self.draw_variant(self.rng.choice(self.table.pools[('numerical', 'sequences')]))
+
+    def draw_diagrammatic_item(self) -> ItemRef:
+        """Pick a diagrammatic sequence or matrix"""
+        # Randomly choose between sequence and matrix questions
+        if self.rng.choice([True, False]):
+            return ItemRef(self.rng.choice(self.table.pools[('diagrammatic', 'sequences')]))
+        # Matrices are drawn uniformly from the hand-written bank and the pre-generated store
+        matrices = self.table.pools[('diagrammatic', 'matrices')]
+        index = self.rng.randrange(len(matrices) + get_matrix_store().count())
+        return ItemRef(matrices[index] if index < len(matrices) else GENERATED_BASE + index - len(matrices))
+
+    def draw_variant(self, number: int) -> ItemRef:
+        """Reference to an item, with a drawn variant for items generated from a rule"""
+        record = self.table.record(number)
+        if record.section_type == 'numerical':
+            return ItemRef(number, *NumericalQuestions.draw_variant(record.data, self.rng))
+        return ItemRef(number)
+
+    def draw_section(self, section_type: str, num_questions: int = 5) -> List[ItemRef]:
+        """Draw the items of a test section of specified type"""
+        generator_map = {
+            'verbal': self.draw_verbal_item,
+            'numerical': self.draw_numerical_item,
+            'diagrammatic': self.draw_diagrammatic_item
+        }
         
-        if question_type == 'relationships':
-            question_text = (
-                f"What is the relationship between {question_data['pair'][0]} and {question_data['pair'][1]}?"
-                if self.lang == 'en' else
-                f"Jaký je vztah mezi slovy {question_data['pair'][0]} a {question_data['pair'][1]}?"
-            )
-        else:
-            question_text = question_data['question']
+        generator = generator_map.get(section_type)
+        if not generator:
+            raise ValueError(f"Unknown section type: {section_type}")
+            
+        return [generator() for _ in range(num_questions)]
+
+    def build_question(self, ref: ItemRef) -> Question:
+        """Build the question an item reference stands for"""
+        record = self.table.record(ref.number)
+        if record.section_type == 'verbal':
+            return self.build_verbal_question(record)
+        if record.section_type == 'numerical':
+            return self.build_numerical_question(record, ref)
+        return self.build_diagrammatic_question(record)
+
+    def build_verbal_question(self, record: ItemRecord) -> Question:
+        """Build a verbal question from a bank item"""
+        text = VerbalQuestions.localize(record.question_type, record.data, self.lang, self.strings)
 
         return Question(
-            question_text=question_text,
-            options=question_data['options'],
-            correct_answer=question_data['correct'],
-            explanation=question_data['explanation']
+            question_text=text['question'],
+            options=text['options'],
+            correct_answer=text['correct'],
+            item_id=record.item_id
         )
 
-    def generate_numerical_question(self) -> Question:
-        """Generate a numerical reasoning question"""
-        # Get a random sequence pattern
-        pattern = NumericalQuestions.get_random_sequence(self.lang)
-        
-        # Generate the sequence and question
-        question_text, options, correct, explanation = (
-            NumericalQuestions.generate_sequence(pattern, self.lang)
-        )
+    def build_numerical_question(self, record: ItemRecord, ref: ItemRef) -> Question:
+        """Build a numerical question from a sequence pattern and its drawn variant"""
+        question_text, options, correct = NumericalQuestions.build_question(
+            record.data, ref.variant, ref.order, self.lang, self.strings)
 
         return Question(
             question_text=question_text,
             options=options,
             correct_answer=correct,
-            explanation=explanation
+            item_id=record.item_id,
+            variant=ref.variant[0]
         )
 
-    def generate_diagrammatic_question(self) -> Question:
-        """Generate a diagrammatic reasoning question"""
-        # Randomly choose between sequence and matrix questions
-        if random.choice([True, False]):
-            # Sequence question
-            sequence = DiagrammaticQuestions.get_random_sequence(self.lang)
-            question_text = DiagrammaticQuestions.format_sequence_question(sequence, self.lang)
+    def build_diagrammatic_question(self, record: ItemRecord) -> Question:
+        """Build a diagrammatic question from a sequence or matrix bank item"""
+        question_data = record.data
+        if record.question_type == 'sequences':
+            question_text = DiagrammaticQuestions.format_sequence_question(question_data, self.lang, self.strings)
             
             return Question(
                 question_text=question_text,
-                options=sequence['options'],
-                correct_answer=sequence['correct'],
-                explanation=sequence['explanation']
+                options=question_data['options'],
+                correct_answer=question_data['correct'],
+                item_id=record.item_id
             )
         else:
-            # Matrix question
-            matrix = DiagrammaticQuestions.get_random_matrix(self.lang)
-            question_text = DiagrammaticQuestions.format_matrix_question(self.lang)
+            matrix = question_data
+            question_text = DiagrammaticQuestions.format_matrix_question(self.lang, self.strings)
             
             return Question(
                 question_text=question_text,
                 options=matrix['options'],
                 correct_answer=matrix['correct'],
-                explanation=matrix['explanation'],
+                item_id=record.item_id,
                 matrix_data={
                     'matrix': matrix['matrix'],
                     'rows': len(matrix['matrix']),
@@ -136,22 +313,231 @@ class TestManager:
                 }
             )
 
+    def item_key(self, ref: ItemRef) -> ItemKey:
+        """Item ID, variant and correct answer of an item reference, without building the question"""
+        record = self.table.record(ref.number)
+        if record.section_type == 'verbal':
+            return ItemKey(record.item_id, None, self.strings.get(self.lang, f"{record.item_id}.correct"))
+        if record.section_type == 'numerical':
+            start = ref.variant[0]
+            return ItemKey(record.item_id, start, str(NumericalQuestions.build_sequence(record.data, start)[-1]))
+        return ItemKey(record.item_id, None, record.data['correct'])
+
+    # Bank categories that take part in each section, in item ID order
+    ITEM_POOLS = {
+        'verbal': ['relationships', 'analogies'],
+        'numerical': ['sequences'],
+        'diagrammatic': ['sequences', 'matrices']
+    }
+
+    def item_pool(self, section_type: str) -> List[Tuple[int, Dict[str, Any]]]:
+        """Return (item number, item_data) pairs for every bank item of a section"""
+        if section_type not in self.ITEM_POOLS:
+            raise ValueError(f"Unknown section type: {section_type}")
+        return [
+            (number, self.table.record(number).data)
+            for question_type in self.ITEM_POOLS[section_type]
+            for number in self.table.pools[(section_type, question_type)]
+        ]
+
+    def review(self, item_id: str, variant: int = None) -> Dict[str, Any]:
+        """
+        Correct answer and explanation of the item with a Question.item_id, or None
+        when there is no such item. Numerical sequences are rebuilt from their start
+        number (variant), since their answer depends on it.
+        """
+        section_type, question_type, key = (item_id.split('.', 2) + [None, None])[:3]
+        if section_type == 'diagrammatic' and question_type == 'generated':
+            item = get_matrix_store().find(key)
+        else:
+            record = self.table.find(item_id)
+            item = record and record.data
+        if item is None:
+            return None
+
+        if section_type == 'verbal':
+            text = VerbalQuestions.localize(question_type, item, self.lang, self.strings)
+            return {'correct_answer': text['correct'], 'explanation': text['explanation']}
+        if section_type == 'numerical':
+            low, high = item['start_range']
+            if variant is None or not low <= variant <= high:
+                return None
+            return {
+                'correct_answer': str(NumericalQuestions.build_sequence(item, variant)[-1]),
+                'explanation': NumericalQuestions.get_explanation(item, self.lang, self.strings)
+            }
+        return {
+            'correct_answer': item['correct'],
+            'explanation': DiagrammaticQuestions.get_explanation(question_type, item, self.lang, self.strings)
+        }
+
     def generate_test_section(self, section_type: str, num_questions: int = 5) -> List[Question]:
         """Generate a complete test section of specified type"""
-        generator_map = {
-            'verbal': self.generate_verbal_question,
-            'numerical': self.generate_numerical_question,
-            'diagrammatic': self.generate_diagrammatic_question
-        }
-        
-        generator = generator_map.get(section_type)
-        if not generator:
-            raise ValueError(f"Unknown section type: {section_type}")
-            
-        return [generator() for _ in range(num_questions)]
+        return [self.build_question(ref) for ref in self.draw_section(section_type, num_questions)]
+
+# Adaptive item banks, built once per section, bank version (and tenant) and shared by all languages
+ADAPTIVE_BANKS: 'OrderedDict[Tuple, AdaptiveItemBank]' = OrderedDict()
+ADAPTIVE_BANK_LIMIT = 64
+
+# Sections whose items carry difficulty levels to seed IRT parameters from; verbal items have none
+ADAPTIVE_SECTIONS = ['numerical', 'diagrammatic']
+
+def get_adaptive_bank(section_type: str, tenant: Tenant = None, bank: Bank = None) -> AdaptiveItemBank:
+    bank = bank or BANKS.current
+    key = (section_type, bank.version) + ((tenant.name, tenant.version) if tenant else ())
+    return cached(ADAPTIVE_BANKS, ADAPTIVE_BANK_LIMIT, key,
+                  lambda: AdaptiveItemBank(TestManager(tenant=tenant, bank=bank).item_pool(section_type)))
+
+# Exam mode runs the sections in this order within one session
+EXAM_SECTIONS = ['verbal', 'numerical', 'diagrammatic']
+
+# Next exam sections are generated and rendered in the background while the
+# candidate works on the current one. Sections are generated from per-exam seeds,
+# so a worker without the prefetched entry produces the same questions.
+PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='exam-prefetch')
+EXAM_PREFETCH: 'OrderedDict[Tuple[str, int, str], Future]' = OrderedDict()
+EXAM_PREFETCH_LIMIT = 1000
+PREFETCH_LOCK = threading.Lock()
+
+def generate_seeded_section(lang: str, section_type: str, seed: int, tenant: Tenant = None,
+                            bank: Bank = None) -> List[ItemRef]:
+    """Draw a section reproducibly from its own stream seeded with seed"""
+    return TestManager(lang, tenant, bank, random.Random(seed)).draw_section(section_type)
+
+class SectionUnavailable(Exception):
+    """The items of a section are gone: no prepared form, or its bank version is no longer available"""
+
+def load_candidate_section(candidate: Dict[str, int], section_type: str) -> Tuple[Bank, List[ItemRef]]:
+    """
+    The bank version and items prepared for an invited candidate, or None when
+    there are none or their bank version is no longer available
+    """
+    prepared = CAMPAIGNS.load_section(candidate['campaign'], candidate['number'], section_type)
+    if prepared is None:
+        return None
+    bank_version, items = prepared
+    bank = BANKS.get(bank_version)
+    if bank is None:
+        return None
+    return bank, [ItemRef.unpack(item) for item in items]
+
+def prepare_exam_section(lang: str, section_type: str, seed: int, candidate: Dict[str, int] = None,
+                         tenant: Tenant = None, bank: Bank = None) -> Tuple[int, List[ItemRef], str]:
+    """
+    Draw (or, for invited candidates, look up) an exam section and render its
+    questions. Returns the bank version, the items and the HTML.
+    """
+    if candidate:
+        prepared = load_candidate_section(candidate, section_type)
+        if prepared is None:
+            raise SectionUnavailable(f"No prepared {section_type} form")
+        bank, refs = prepared
+    elif bank is None:
+        raise SectionUnavailable('Question bank version no longer available')
+    else:
+        refs = generate_seeded_section(lang, section_type, seed, tenant, bank)
+    test_manager = TestManager(lang, tenant, bank)
+    with app.app_context():
+        html = render_template('_questions.html', questions=[test_manager.build_question(ref) for ref in refs])
+    return test_manager.bank.version, refs, html
+
+def prefetch_exam_section(exam: Dict[str, Any], index: int, lang: str) -> Future:
+    """Return the (possibly still running) background job preparing an exam section"""
+    key = (exam['id'], index, lang)
+    with PREFETCH_LOCK:
+        future = EXAM_PREFETCH.get(key)
+        if future is None:
+            future = PREFETCH_EXECUTOR.submit(
+                prepare_exam_section, lang, exam['sections'][index], exam['seeds'][index],
+                exam.get('candidate'), TENANTS.get(exam.get('tenant')), BANKS.get(exam.get('bank'))
+            )
+            EXAM_PREFETCH[key] = future
+            while len(EXAM_PREFETCH) > EXAM_PREFETCH_LIMIT:
+                EXAM_PREFETCH.popitem(last=False)
+    return future
+
+def start_exam_section(exam: Dict[str, Any], lang: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Make the exam's current section the test in progress, prefetch the following
+    one and return the test and its rendered questions
+    """
+    index = exam['index']
+    bank_version, refs, html = prefetch_exam_section(exam, index, lang).result()
+    with PREFETCH_LOCK:
+        EXAM_PREFETCH.pop((exam['id'], index, lang), None)
+    candidate = exam.get('candidate')
+    test = issue_test(exam['sections'][index], 'exam', lang, exam.get('tenant'), bank_version, refs, candidate)
+    if candidate:
+        CAMPAIGNS.start_section(candidate['campaign'], candidate['number'], test['section_type'], test['id'])
+    if index + 1 < len(exam['sections']):
+        prefetch_exam_section(exam, index + 1, lang)
+    return test, html
+
+def issue_test(section_type: str, mode: str, lang: str, tenant_name: str, bank_version: int,
+               refs: List[ItemRef], candidate: Dict[str, int] = None) -> Dict[str, Any]:
+    """
+    Store a newly started test and make it the session's test in progress. The store
+    only keeps item references; questions are built for the page.
+    """
+    test = {
+        'id': uuid.uuid4().hex,
+        'section_type': section_type,
+        'mode': mode,
+        'lang': lang,
+        'tenant': tenant_name,
+        'bank': bank_version,
+        'items': [ref.pack() for ref in refs],
+        'start_time': datetime.datetime.now().isoformat(),
+        'answers': [],
+        'answer_seq': 0,
+        'candidate': candidate
+    }
+    if mode != 'adaptive':
+        test['timings'] = [None] * len(refs)
+    PROGRESS.create(test)
+    session['test_id'] = test['id']
+    return test
+
+def elapsed_seconds(test: Dict[str, Any]) -> float:
+    return (datetime.datetime.now() - datetime.datetime.fromisoformat(test['start_time'])).total_seconds()
+
+def resumable_test(section_type: str, mode: str, test_id: str = None) -> Dict[str, Any]:
+    """
+    The session's test in progress (or the test with test_id) if it is a test of
+    section_type in mode that can be resumed (within the time limit and not
+    submitted), or None
+    """
+    test = PROGRESS.get(test_id or session.get('test_id'))
+    if (test is None or test['section_type'] != section_type or test['mode'] != mode
+            or elapsed_seconds(test) >= SECTION_TIME_LIMIT or BANKS.get(test['bank']) is None
+            or stored_result(test['id']) is not None):
+        return None
+    return test
+
+def render_test(test: Dict[str, Any], **context) -> str:
+    """The page of a test in progress, with the answers saved so far and the time it has left"""
+    test_manager = test_manager_for(test)
+    return render_template('test.html',
+                         section_type=test['section_type'],
+                         questions=[test_manager.build_question(ref) for ref in test_items(test)],
+                         test_id=test['id'],
+                         saved_answers=test['answers'],
+                         answer_seq=test['answer_seq'],
+                         time_left=max(int(SECTION_TIME_LIMIT - elapsed_seconds(test)), 0),
+                         t=TRANSLATIONS[session.get('lang', 'en')],
+                         **context)
 
 @app.before_request
 def before_request():
+    # New bank versions are picked up between requests; a request uses one version throughout
+    rejected = BANKS.refresh()
+    if rejected:
+        app.logger.error(rejected)
+    g.bank = BANKS.current
+    g.rng = RANDOM_STREAMS.spawn()
+    # Reviews and the service worker's files are shared through caches, so they must not touch the session cookie
+    if request.endpoint in ('review_item', 'service_worker', 'static'):
+        return
     if 'lang' not in session:
         session['lang'] = 'en'
 
@@ -166,53 +552,621 @@ def index():
     translations = TRANSLATIONS[session.get('lang', 'en')]
     return render_template('index.html', t=translations)
 
+@app.route('/sw.js')
+def service_worker():
+    """
+    Service worker of the site (templates/sw.js). Served from the site root (or the
+    tenant's prefix) so that it controls every page below it.
+    """
+    queue_url = url_for('static', filename='submission_queue.js', v=SHELL_VERSION)
+    script = render_template('sw.js',
+                             version=SHELL_VERSION,
+                             queue_url=queue_url,
+                             shell=[url_for('index')],
+                             assets=list(CDN_ASSETS.values()) + [queue_url],
+                             start_paths=[url_for('index') + path
+                                          for path in ('start_test/', 'start_exam', 'start_adaptive/', 'c/')])
+    response = Response(script, mimetype='application/javascript')
+    # Browsers look for a new worker on page loads; the version inside changes with the shell
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/c/<token>')
+def campaign_link(token):
+    """One-time campaign link: binds the session to the candidate's prepared forms"""
+    claimed = CAMPAIGNS.claim(token)
+    if claimed is None:
+        status = CAMPAIGNS.link_status(token)
+        if status == 'pending':
+            # The forms are still being generated; the same link works once they are
+            return 'Your test is being prepared, please try again shortly.', 503, {'Retry-After': '60'}
+        abort(404 if status is None else 410)
+    campaign_id, number, lang = claimed
+    session['candidate'] = {'campaign': campaign_id, 'number': number}
+    if lang in TRANSLATIONS:
+        session['lang'] = lang
+    return redirect(url_for('index'))
+
 @app.route('/start_test/<section_type>')
 def start_test(section_type):
     """Start a new test section with questions in the current language"""
+    test = resumable_test(section_type, 'section')
+    if test is not None:
+        # A reload or a crashed tab carries on with the answers saved so far
+        return render_test(test)
     lang = session.get('lang', 'en')
-    translations = TRANSLATIONS[lang]
     
-    # Create test manager with current language
-    test_manager = TestManager(lang)
-    questions = test_manager.generate_test_section(section_type)
+    candidate = session.get('candidate')
+    if candidate:
+        started = CAMPAIGNS.started_sections(candidate['campaign'], candidate['number']).get(section_type)
+        if started is not None:
+            # Invited candidates take each section once; one they left resumes while its time lasts
+            test_id, completed = started
+            test = None if completed else resumable_test(section_type, 'section', test_id)
+            if test is None:
+                abort(409)
+            session['test_id'] = test_id
+            return render_test(test)
+        # Invited candidates take the form prepared for them
+        prepared = load_candidate_section(candidate, section_type)
+        if prepared is None:
+            abort(404)
+        bank, refs = prepared
+        test_manager = TestManager(lang, bank=bank)
+    else:
+        # Create test manager with current language
+        test_manager = TestManager(lang, g.tenant, g.bank, g.rng)
+        refs = test_manager.draw_section(section_type)
     
-    # Store test data in session
-    questions_data = [q.to_dict() for q in questions]
-    session['current_test'] = {
-        'section_type': section_type,
-        'questions': questions_data,
-        'start_time': datetime.datetime.now().isoformat(),
-        'answers': []
-    }
-    
-    return render_template('test.html', 
-                         section_type=section_type, 
-                         questions=questions, 
-                         t=translations)
+    test = issue_test(section_type, 'section', lang, test_manager.tenant.name if test_manager.tenant else None,
+                      test_manager.bank.version, refs, candidate)
+    if candidate and CAMPAIGNS.start_section(candidate['campaign'], candidate['number'], section_type,
+                                             test['id']) != test['id']:
+        # Another tab started the section first
+        return redirect(url_for('start_test', section_type=section_type))
+    return render_test(test)
 
 @app.route('/submit_test', methods=['POST'])
 def submit_test():
-    """Handle test submission and calculate results"""
-    answers = request.json.get('answers', [])
-    current_test = session.get('current_test', {})
-    questions = current_test.get('questions', [])
+    """
+    Handle test submission and calculate results.
+
+    Submissions may be retried from the candidate's device after a network failure,
+    so they are idempotent: a test that was already recorded keeps its stored result.
+    They are scored from the stored test they name, whatever session cookie they carry.
+    """
+    data = request.json
+    test_id = data.get('test_id') or session.get('test_id')
+    # Only the session's own test moves its exam on
+    in_session = test_id == session.get('test_id')
+    if not in_session:
+        # The first attempt went through but its response (and session cookie) never arrived
+        stored = stored_result(test_id)
+        if stored is not None:
+            return jsonify(stored)
+    current_test = PROGRESS.get(test_id)
+    if current_test is None:
+        return jsonify({'error': 'No matching test in progress'}), 409
+    test_manager = test_manager_for(current_test)
+    if test_manager is None:
+        return jsonify({'error': 'Question bank version no longer available'}), 409
+    
+    elapsed = elapsed_seconds(current_test)
+    if elapsed > SECTION_TIME_LIMIT + AUTOSAVE_GRACE_SECONDS + LATE_SUBMISSION_SECONDS:
+        return jsonify({'error': 'Time is up'}), 409
+    exam = session.get('exam') if in_session else None
+    if current_test.get('mode') == 'exam' and exam and data.get('section_index') != exam['index']:
+        stored = stored_result(current_test.get('id'))
+        if stored is not None:
+            return jsonify(stored)
+        return jsonify({'error': 'Section already submitted'}), 409
+    
+    keys = [test_manager.item_key(ref) for ref in test_items(current_test)]
+    late = elapsed > SECTION_TIME_LIMIT + AUTOSAVE_GRACE_SECONDS
+    if late:
+        # Sent from the device's queue after the deadline: only what was autosaved in time counts
+        answers = current_test.get('answers', [])
+    elif 'answers' in data:
+        answers = data['answers']
+    else:
+        # Autosaving clients only send the changes the server has not acknowledged yet
+        current_test, _ = PROGRESS.update(current_test['id'], lambda test: merge_saved_changes(test, data))
+        answers = current_test['answers']
+    
+    stored = stored_result(current_test.get('id'))
+    if stored is not None:
+        # A retry carrying an older session cookie: keep the score and time recorded first
+        result = {key: value for key, value in stored.items() if key in RESULT_FIELDS}
+    else:
+        score = sum(1 for key, a in zip(keys, answers) if key.correct_answer == a)
+        result = {
+            'score': score,
+            'total': len(keys),
+            'percentage': (score / len(keys)) * 100,
+            'time_taken': int(min(elapsed, SECTION_TIME_LIMIT))
+        }
+        if late:
+            result['late'] = True
+        if 'timings' in current_test:
+            _, first = PROGRESS.update(current_test['id'], mark_timings_recorded)
+            if first:
+                for key, entry in zip(keys, current_test['timings']):
+                    timing_histograms.record(key.item_id, entry)
+            result['fast_answers'] = sum(1 for entry in current_test['timings'] if is_fast_guess(entry))
+    
+    if current_test.get('mode') != 'exam':
+        result['review'] = review_references(keys, answers, test_manager.bank.version)
+    if current_test.get('mode') == 'exam' and exam:
+        try:
+            result.update(advance_exam(exam, current_test['section_type'], result))
+        except SectionUnavailable as e:
+            # The section itself still counts
+            record_result(current_test, result, answers, keys)
+            return jsonify({'error': str(e)}), 409
+        if 'next_section' in result:
+            result['test_id'] = session['test_id']
+    
+    record_result(current_test, result, answers, keys)
+    return jsonify(result)
+
+# Result fields a retried submission takes over from the stored result
+RESULT_FIELDS = ['score', 'total', 'percentage', 'time_taken', 'late', 'fast_answers']
+
+def stored_result(test_id: str) -> Dict[str, Any]:
+    """The recorded result of a test, or None when it was not recorded (or the store is unavailable)"""
+    if not test_id:
+        return None
+    try:
+        return RESULTS.get(test_id)
+    except sqlite3.Error:
+        app.logger.exception('Could not read the stored result of test %s', test_id)
+        return None
+
+def test_manager_for(current_test: Dict[str, Any]) -> TestManager:
+    """
+    TestManager for the language, tenant and bank version a test was started with,
+    or None when that bank version is no longer available
+    """
+    bank = BANKS.get(current_test.get('bank'))
+    if bank is None:
+        return None
+    return TestManager(current_test.get('lang', 'en'), TENANTS.get(current_test.get('tenant')), bank, g.rng)
+
+def test_items(current_test: Dict[str, Any]) -> List[ItemRef]:
+    return [ItemRef.unpack(item) for item in current_test.get('items', [])]
+
+def record_result(current_test: Dict[str, Any], result: Dict[str, Any], answers: List[Any],
+                  keys: List[ItemKey]):
+    """
+    Store a finished section for exports and mark an invited candidate's section
+    completed; a storage failure must not fail the submission
+    """
+    if 'id' not in current_test:
+        return
+    candidate = current_test.get('candidate')
+    try:
+        RESULTS.record(current_test['id'], current_test['section_type'], current_test.get('lang', 'en'),
+                       current_test.get('mode', 'section'), result,
+                       item_details(keys, answers, current_test.get('timings')),
+                       candidate=candidate)
+        if candidate:
+            CAMPAIGNS.complete_section(candidate['campaign'], candidate['number'], current_test['section_type'])
+    except sqlite3.Error:
+        app.logger.exception('Could not store the result of test %s', current_test['id'])
+
+def review_signature(item_id: str, variant: int, bank_version: int) -> str:
+    """
+    HMAC of a review reference. Only results carry signed references, so the answer key
+    of an item cannot be fetched during a test; the same item gets the same signature for
+    every candidate, which keeps review URLs cacheable.
+    """
+    message = json.dumps([item_id, variant, bank_version]).encode('utf-8')
+    return hmac.new(app.secret_key.encode('utf-8'), message, hashlib.sha256).hexdigest()[:32]
+
+def review_references(keys: List[ItemKey], answers: List[Any], bank_version: int) -> List[Dict[str, Any]]:
+    """What the results view needs to fetch the review of each question, with the given answers"""
+    return [
+        {
+            'item_id': key.item_id,
+            'variant': key.variant,
+            'bank': bank_version,
+            'sig': review_signature(key.item_id, key.variant, bank_version),
+            'answer': answers[i] if i < len(answers) else None
+        }
+        for i, key in enumerate(keys)
+    ]
+
+# Reviews depend on the item and bank version only, so browsers and shared caches may keep them long
+REVIEW_MAX_AGE = 30 * 24 * 3600
+
+@lru_cache(maxsize=4096)
+def cached_review(lang: str, item_id: str, variant: int = None, tenant_name: str = None,
+                  bank_version: int = None) -> Dict[str, Any]:
+    bank = BANKS.get(bank_version)
+    if bank is None:
+        return None
+    return TestManager(lang, TENANTS.get(tenant_name), bank).review(item_id, variant)
+
+@app.route('/review/<lang>/<item_id>')
+def review_item(lang, item_id):
+    """
+    Correct answer and explanation of one item, fetched by the results view after submission
+    with the signed reference the result carries
+    """
+    # Only numerical items have variants; ignoring the rest keeps one cache entry per item
+    variant = request.args.get('v', type=int) if item_id.startswith('numerical.') else None
+    bank_version = request.args.get('b', type=int)
+    if not hmac.compare_digest(request.args.get('s', ''), review_signature(item_id, variant, bank_version)):
+        return jsonify({'error': 'Invalid review reference'}), 403
+    review = (cached_review(lang, item_id, variant, g.tenant.name if g.tenant else None, bank_version)
+              if lang in TRANSLATIONS else None)
+    if review is None:
+        return jsonify({'error': 'Unknown item'}), 404
     
-    # Calculate score
-    score = sum(1 for q, a in zip(questions, answers) if q['correct_answer'] == a)
+    response = jsonify(review)
+    response.cache_control.public = True
+    response.cache_control.max_age = REVIEW_MAX_AGE
+    response.add_etag()
+    return response.make_conditional(request)
+
+def merge_answer_changes(current_test: Dict[str, Any], data: Dict[str, Any]) -> int:
+    """
+    Merge a batch of answer changes ({question index: answer}) into the test in progress.
+    Batches carry increasing sequence numbers and each one repeats every change not yet
+    acknowledged, so a replayed or out-of-order older batch is simply ignored.
+    Returns the sequence number the stored answers are now at.
+    """
+    seq = data.get('seq')
+    if isinstance(seq, int) and seq > current_test.get('answer_seq', 0):
+        count = len(current_test['items'])
+        answers = current_test['answers'] + [None] * (count - len(current_test['answers']))
+        for key, value in (data.get('changes') or {}).items():
+            index = int(key) if str(key).isdigit() else -1
+            if 0 <= index < count:
+                answers[index] = value
+        current_test['answers'] = answers
+        current_test['answer_seq'] = seq
+    return current_test.get('answer_seq', 0)
+
+def merge_saved_changes(current_test: Dict[str, Any], data: Dict[str, Any]) -> int:
+    """Merge a batch of answer changes and timing events; returns the acknowledged sequence number"""
+    seq = merge_answer_changes(current_test, data)
+    if 'timings' in current_test:
+        merge_timing_events(current_test['timings'], data.get('timing'))
+    return seq
+
+def mark_timings_recorded(current_test: Dict[str, Any]) -> bool:
+    """Flag a test's timings as added to the histograms; True the first time only"""
+    first = not current_test.get('timings_recorded')
+    current_test['timings_recorded'] = True
+    return first
+
+@app.route('/autosave', methods=['POST'])
+def autosave():
+    """Store a batch of answer changes for the test in progress"""
+    data = request.get_json(force=True, silent=True) or {}
     
-    # Calculate time taken
-    start_time = datetime.datetime.fromisoformat(current_test['start_time'])
-    time_taken = (datetime.datetime.now() - start_time).seconds
+    def save(current_test):
+        if elapsed_seconds(current_test) > SECTION_TIME_LIMIT + AUTOSAVE_GRACE_SECONDS:
+            return None
+        return merge_saved_changes(current_test, data)
     
-    # Prepare results
-    result = {
+    # Merged in the store, so batches that overlap on a slow connection cannot undo each other
+    current_test, seq = PROGRESS.update(data.get('test_id'), save)
+    if current_test is None:
+        return jsonify({'error': 'No matching test in progress'}), 409
+    if seq is None:
+        return jsonify({'error': 'Time is up'}), 409
+    return jsonify({'seq': seq})
+
+def advance_exam(exam: Dict[str, Any], section_type: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Record a section result and move the exam on to its next section or final result.
+    Raises SectionUnavailable, before anything changes, when the next section cannot be prepared.
+    """
+    lang = session.get('lang', 'en')
+    candidate = exam.get('candidate')
+    if exam['index'] + 1 < len(exam['sections']):
+        next_type = exam['sections'][exam['index'] + 1]
+        if candidate and next_type in CAMPAIGNS.started_sections(candidate['campaign'], candidate['number']):
+            raise SectionUnavailable(f"The {next_type} section was already taken")
+        prefetch_exam_section(exam, exam['index'] + 1, lang).result()
+    exam['results'].append(dict(result, section_type=section_type))
+    exam['index'] += 1
+    session['exam'] = exam
+    
+    if exam['index'] < len(exam['sections']):
+        start_exam_section(exam, lang)
+        return {'next_section': exam['index']}
+    
+    session.pop('exam')
+    translations = TRANSLATIONS[lang]
+    score = sum(r['score'] for r in exam['results'])
+    total = sum(r['total'] for r in exam['results'])
+    return {'exam_result': {
+        'sections': [
+            dict(r, title=translations[f"{r['section_type']}_section"]['title'])
+            for r in exam['results']
+        ],
         'score': score,
-        'total': len(questions),
-        'percentage': (score / len(questions)) * 100,
-        'time_taken': time_taken
+        'total': total,
+        'percentage': (score / total) * 100,
+        'time_taken': sum(r['time_taken'] for r in exam['results'])
+    }}
+
+@app.route('/start_exam')
+def start_exam():
+    """Start an exam that chains all sections in one session"""
+    exam = session.get('exam')
+    test = resumable_test(exam['sections'][exam['index']], 'exam') if exam else None
+    if test is not None:
+        # A reload or a crashed tab carries on with the current section
+        return render_test(test, exam=True, exam_index=exam['index'], exam_total=len(exam['sections']))
+    candidate = session.get('candidate')
+    if candidate and CAMPAIGNS.started_sections(candidate['campaign'], candidate['number']):
+        # An exam takes every section, and invited candidates take each section once
+        abort(409)
+    lang = session.get('lang', 'en')
+    exam = {
+        'id': uuid.uuid4().hex,
+        'sections': EXAM_SECTIONS,
+        'seeds': [g.rng.getrandbits(63) for _ in EXAM_SECTIONS],
+        'index': 0,
+        'results': [],
+        'candidate': candidate,
+        # Invited candidates take the stock forms prepared for them
+        'tenant': g.tenant.name if g.tenant and not session.get('candidate') else None,
+        'bank': g.bank.version
     }
+    try:
+        test, html = start_exam_section(exam, lang)
+    except SectionUnavailable:
+        abort(409)
+    session['exam'] = exam
     
-    return jsonify(result)
+    return render_template('test.html',
+                         section_type=exam['sections'][0],
+                         questions_html=html,
+                         exam=True,
+                         exam_index=0,
+                         exam_total=len(exam['sections']),
+                         test_id=test['id'],
+                         t=TRANSLATIONS[lang])
+
+@app.route('/exam/section/<int:index>')
+def exam_section(index):
+    """Return the rendered questions of an upcoming exam section for the client to prefetch"""
+    exam = session.get('exam')
+    if not exam or not exam['index'] <= index < len(exam['sections']):
+        return jsonify({'error': 'No such exam section'}), 404
+    
+    lang = session.get('lang', 'en')
+    try:
+        _, _, html = prefetch_exam_section(exam, index, lang).result()
+    except SectionUnavailable as e:
+        return jsonify({'error': str(e)}), 409
+    section_type = exam['sections'][index]
+    return jsonify({
+        'section_type': section_type,
+        'title': TRANSLATIONS[lang][f'{section_type}_section']['title'],
+        'html': html
+    })
+
+@app.route('/start_adaptive/<section_type>')
+def start_adaptive(section_type):
+    """Start an adaptive test section that picks each question from the answers so far"""
+    if section_type not in ADAPTIVE_SECTIONS:
+        abort(404)
+    lang = session.get('lang', 'en')
+    translations = TRANSLATIONS[lang]
+    
+    test_manager = TestManager(lang, g.tenant, g.bank, g.rng)
+    adaptive = AdaptiveSession(get_adaptive_bank(section_type, g.tenant, g.bank), g.rng)
+    ref = test_manager.draw_variant(adaptive.first_item())
+    question = test_manager.build_question(ref)
+    issue_test(section_type, 'adaptive', lang, g.tenant.name if g.tenant else None, g.bank.version, [ref])
+    
+    return render_template('test.html',
+                         section_type=section_type,
+                         questions=[question],
+                         adaptive=True,
+                         max_questions=adaptive.max_items,
+                         t=translations)
+
+@app.route('/adaptive_answer', methods=['POST'])
+def adaptive_answer():
+    """Record the answer to the current adaptive question and return the next one or the result"""
+    current_test = PROGRESS.get(session.get('test_id'))
+    if current_test is None or current_test['mode'] != 'adaptive':
+        return jsonify({'error': 'No adaptive test in progress'}), 400
+    
+    section_type = current_test['section_type']
+    # Item numbers refer to the bank version the test started with
+    test_manager = test_manager_for(current_test)
+    if test_manager is None:
+        return jsonify({'error': 'Question bank version no longer available'}), 409
+    
+    def record_answer(test):
+        # The answer must be to the question on screen; a double click or replay would score it against the next one
+        if request.json.get('index') != len(test['items']) or len(test['answers']) != len(test['items']) - 1:
+            return False
+        test['answers'].append(request.json.get('answer'))
+        return True
+    
+    current_test, accepted = PROGRESS.update(current_test['id'], record_answer)
+    if not accepted:
+        return jsonify({'error': 'Answer does not match the current question'}), 409
+    refs = test_items(current_test)
+    answers = current_test['answers']
+    keys = [test_manager.item_key(ref) for ref in refs]
+    
+    responses = [
+        (ref.number, key.correct_answer == a)
+        for ref, key, a in zip(refs, keys, answers)
+    ]
+    adaptive = AdaptiveSession(get_adaptive_bank(section_type, test_manager.tenant, test_manager.bank), g.rng)
+    number, theta, standard_error = adaptive.next_item(responses)
+    
+    if number is None or request.json.get('final'):
+        score = sum(1 for _, correct in responses if correct)
+        start_time = datetime.datetime.fromisoformat(current_test['start_time'])
+        result = {
+            'finished': True,
+            'score': score,
+            'total': len(responses),
+            'percentage': (score / len(responses)) * 100,
+            'time_taken': (datetime.datetime.now() - start_time).seconds,
+            'theta': round(theta, 2),
+            'standard_error': round(standard_error, 2),
+            'review': review_references(keys, answers, test_manager.bank.version)
+        }
+        record_result(current_test, result, answers, keys)
+        return jsonify(result)
+    
+    ref = test_manager.draw_variant(number)
+    question = test_manager.build_question(ref)
+    PROGRESS.update(current_test['id'], lambda test: test['items'].append(ref.pack()))
+    
+    return jsonify({
+        'finished': False,
+        'index': len(refs) + 1,
+        'question': question.to_client_dict()
+    })
+
+@app.route('/export/results')
+def export_results():
+    """
+    Stream stored results as CSV (one row per item) or NDJSON. Query parameters:
+    format, gzip, section, lang, since, until (ISO dates) and after, the ID of the
+    last result of a previous export to resume from.
+    """
+    if not EXPORT_TOKEN or request.headers.get('Authorization') != f'Bearer {EXPORT_TOKEN}':
+        abort(404)
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    compress = request.args.get('gzip') in ('1', 'true')
+    
+    results = RESULTS.iter_results(
+        section_type=request.args.get('section'),
+        lang=request.args.get('lang'),
+        since=request.args.get('since'),
+        until=request.args.get('until'),
+        after=request.args.get('after', 0, type=int)
+    )
+    filename = f"results.{fmt}" + ('.gz' if compress else '')
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(encode_stream(export_lines(results, fmt), compress),
+                        mimetype='application/gzip' if compress else mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/score_form', methods=['POST', 'OPTIONS'])
+def score_form():
+    """Score a statically exported form from its form ID and the submitted answers"""
+    if request.method == 'OPTIONS':
+        response = app.make_default_options_response()
+    else:
+        data = request.get_json(silent=True) or {}
+        key = FORM_KEYS.get(data.get('form_id', ''))
+        if key is None:
+            response = jsonify({'error': 'Unknown form'})
+            response.status_code = 404
+        else:
+            answers = data.get('answers', [])
+            correct = key['correct']
+            score = sum(1 for c, a in zip(correct, answers) if c == a)
+            # Static pages have no server-side start time, so the client reports it
+            try:
+                time_taken = int(data.get('time_taken', 0))
+            except (TypeError, ValueError):
+                time_taken = 0
+            response = jsonify({
+                'score': score,
+                'total': len(correct),
+                'percentage': (score / len(correct)) * 100,
+                'time_taken': min(max(time_taken, 0), SECTION_TIME_LIMIT)
+            })
+    response.headers['Access-Control-Allow-Origin'] = STATIC_ORIGIN
+    response.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+@app.cli.command('export-static')
+@click.option('--out', default='dist', help='Directory of the static bundle')
+@click.option('--keys', 'keys_path', default=None, help='Answer key file (kept on the server)')
+@click.option('--forms', default=20, help='Forms per section and language')
+@click.option('--score-url', default='/score_form', help='Absolute URL of the scoring endpoint')
+@click.option('--seed', type=int, default=None, help='Root seed to reproduce an export (default: fresh entropy)')
+def export_static(out, keys_path, forms, score_url, seed):
+    """Pre-generate seeded test forms as a static bundle for a CDN"""
+    # The seed reproduces every form and answer key, so a fixed default would publish them with the source
+    if seed is None:
+        seed = secrets.randbits(63)
+    manifest = export_bundles(app, TestManager, TRANSLATIONS, out, keys_path or FORM_KEYS.path,
+                              forms_per_section=forms, score_url=score_url, seed=seed)
+    total = sum(len(pages) for sections in manifest['forms'].values() for pages in sections.values())
+    click.echo(f"Exported {total} forms to {out} (seed {seed}; keep it private, it reproduces the answer keys)")
+
+@app.cli.command('campaign-import')
+@click.argument('csv_path')
+@click.option('--name', required=True, help='Campaign name')
+@click.option('--campaign', 'campaign_id', type=int, default=None, help='Add to an existing campaign')
+@click.option('--seed', type=int, default=None, help='Root seed of the candidate seeds')
+def campaign_import(csv_path, name, campaign_id, seed):
+    """Import candidates (email, name, lang columns) from a CSV file"""
+    if campaign_id is None:
+        campaign_id = CAMPAIGNS.create_campaign(name)
+    added = CAMPAIGNS.import_candidates(campaign_id, read_candidates(csv_path), seed=seed)
+    click.echo(f"Imported {added} candidates into campaign {campaign_id}")
+
+@app.cli.command('campaign-generate')
+@click.argument('campaign_id', type=int)
+@click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+@click.option('--chunk', default=1000, help='Candidates committed per checkpoint')
+def campaign_generate(campaign_id, workers, chunk):
+    """Pre-generate the forms of a campaign's candidates; rerun to resume"""
+    def report(done, total, rate):
+        click.echo(f"{done}/{total} candidates ready ({rate:.0f}/s)")
+
+    generated = pregenerate(CAMPAIGNS, campaign_id, TestManager, workers=workers,
+                            chunk_size=chunk, report=report)
+    click.echo(f"Generated forms for {generated} candidates")
+
+@app.cli.command('campaign-links')
+@click.argument('campaign_id', type=int)
+@click.option('--base-url', required=True, help='Public URL of the site')
+@click.option('--out', type=click.File('w', encoding='utf-8'), default='-', help='CSV file of links')
+def campaign_links(campaign_id, base_url, out):
+    """Write every candidate's one-time link as CSV"""
+    writer = csv.writer(out)
+    writer.writerow(['email', 'name', 'lang', 'link'])
+    for number, email, name, lang, token in CAMPAIGNS.candidates(campaign_id):
+        writer.writerow([email, name, lang, f"{base_url.rstrip('/')}/c/{token}"])
+
+@app.cli.command('export-results')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='ndjson', help='Output format')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output')
+@click.option('--section', default=None, help='Only this section')
+@click.option('--lang', default=None, help='Only this language')
+@click.option('--since', default=None, help='Completed at or after this ISO date')
+@click.option('--until', default=None, help='Completed before this ISO date')
+@click.option('--after', default=0, help='Resume after this result ID')
+@click.option('--out', type=click.File('wb'), default='-', help='Output file')
+def export_results_command(fmt, compress, section, lang, since, until, after, out):
+    """Stream stored results as CSV or NDJSON; prints the cursor to resume from"""
+    cursor = {'after': after}
+    
+    def track(results):
+        for result in results:
+            yield result
+            cursor['after'] = result['id']
+    
+    results = RESULTS.iter_results(section_type=section, lang=lang, since=since, until=until, after=after)
+    for chunk in encode_stream(export_lines(track(results), fmt), compress):
+        out.write(chunk)
+    click.echo(f"Resume with --after {cursor['after']}", err=True)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
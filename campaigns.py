@@ -0,0 +1,267 @@
+"""
+Candidate campaigns.
+
+A campaign is a list of invited candidates imported from CSV. Every candidate
+gets a seed, and their personal forms for all sections are drawn ahead of time
+by TestManager in a process pool, then stored compressed in a SQLite file
+shared by the workers. A form is the bank version it was drawn from and the
+packed item references of each section (see questions/records.py). Candidates
+arrive through a one-time link carrying a random token of their own; after that,
+starting a section only looks their prepared form up. Every section a candidate
+starts is recorded with its test, so it can be resumed but never taken again.
+
+Generation commits every chunk of candidates, so an interrupted run resumes
+where it stopped when started again.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import datetime
+import json
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+
+from questions.rng import SeedSequence
+
+SECTIONS = ['verbal', 'numerical', 'diagrammatic']
+
+# Random bytes of a link token; links are not derived from anything guessable
+TOKEN_BYTES = 18
+
+
+def read_candidates(path: str, default_lang: str = 'en') -> Iterator[Dict[str, str]]:
+    """
+    Reads candidates from a CSV file with an email column and optional
+    name and lang columns, one row at a time.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            email = (row.get('email') or '').strip()
+            if email:
+                yield {
+                    'email': email,
+                    'name': (row.get('name') or '').strip(),
+                    'lang': (row.get('lang') or '').strip() or default_lang
+                }
+
+
+def pack_forms(forms: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(forms, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def unpack_forms(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def generate_forms(test_manager_cls, batch: List[Tuple[int, str, int]]) -> List[Tuple[int, bytes]]:
+    """Pool worker: generates the forms of (candidate number, lang, seed) entries"""
+    packed = []
+    for number, lang, seed in batch:
+        test_manager = test_manager_cls(lang, rng=random.Random(seed))
+        forms = {
+            'bank': test_manager.bank.version,
+            'sections': {
+                section_type: [ref.pack() for ref in test_manager.draw_section(section_type)]
+                for section_type in SECTIONS
+            }
+        }
+        packed.append((number, pack_forms(forms)))
+    return packed
+
+
+class CampaignStore:
+    """
+    Campaigns, candidates and their prepared forms in a SQLite file
+    shared by all worker processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            if not self._ready:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS campaigns ('
+                    'id INTEGER PRIMARY KEY, name TEXT, created TEXT)'
+                )
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS candidates ('
+                    'campaign_id INTEGER, number INTEGER, email TEXT, name TEXT, lang TEXT, '
+                    'seed INTEGER, forms BLOB, claimed TEXT, token TEXT UNIQUE, '
+                    'PRIMARY KEY (campaign_id, number))'
+                )
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS sections ('
+                    'campaign_id INTEGER, number INTEGER, section_type TEXT, test_id TEXT, '
+                    'started TEXT, completed TEXT, PRIMARY KEY (campaign_id, number, section_type))'
+                )
+                conn.commit()
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def create_campaign(self, name: str) -> int:
+        with self._connection() as conn:
+            cursor = conn.execute('INSERT INTO campaigns (name, created) VALUES (?, ?)',
+                                  (name, datetime.datetime.now().isoformat()))
+            return cursor.lastrowid
+
+    def import_candidates(self, campaign_id: int, candidates: Iterable[Dict[str, str]],
+                          seed: Optional[int] = None) -> int:
+        """
+        Adds candidates numbered after the existing ones. Each gets their own
+        seed, spawned from seed for their campaign and number, and a random
+        link token.
+        """
+        conn = self._connection()
+        root = SeedSequence(seed)
+        (number,) = conn.execute('SELECT COALESCE(MAX(number), -1) + 1 FROM candidates WHERE campaign_id = ?',
+                                 (campaign_id,)).fetchone()
+        start = number
+        with conn:
+            for candidate in candidates:
+                conn.execute(
+                    'INSERT INTO candidates (campaign_id, number, email, name, lang, seed, token) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (campaign_id, number, candidate['email'], candidate['name'], candidate['lang'],
+                     root.child(campaign_id, number).seed(63), secrets.token_urlsafe(TOKEN_BYTES))
+                )
+                number += 1
+        return number - start
+
+    def progress(self, campaign_id: int) -> Tuple[int, int]:
+        """(candidates with prepared forms, all candidates)"""
+        return self._connection().execute(
+            'SELECT COUNT(forms), COUNT(*) FROM candidates WHERE campaign_id = ?', (campaign_id,)
+        ).fetchone()
+
+    def pending(self, campaign_id: int, limit: int) -> List[Tuple[int, str, int]]:
+        return self._connection().execute(
+            'SELECT number, lang, seed FROM candidates WHERE campaign_id = ? AND forms IS NULL '
+            'ORDER BY number LIMIT ?', (campaign_id, limit)
+        ).fetchall()
+
+    def save_forms(self, campaign_id: int, packed: List[Tuple[int, bytes]]):
+        with self._connection() as conn:
+            conn.executemany('UPDATE candidates SET forms = ? WHERE campaign_id = ? AND number = ?',
+                             [(blob, campaign_id, number) for number, blob in packed])
+
+    def candidates(self, campaign_id: int) -> Iterator[Tuple[int, str, str, str, str]]:
+        """(number, email, name, lang, link token) of every candidate, streamed"""
+        return self._connection().execute(
+            'SELECT number, email, name, lang, token FROM candidates WHERE campaign_id = ? ORDER BY number',
+            (campaign_id,)
+        )
+
+    def claim(self, token: str) -> Optional[Tuple[int, int, str]]:
+        """
+        Marks the link with a token as used. Returns the candidate's campaign,
+        number and language, or None when the link was used before, the forms
+        are not ready or there is no such link.
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'UPDATE candidates SET claimed = ? '
+                'WHERE token = ? AND claimed IS NULL AND forms IS NOT NULL',
+                (datetime.datetime.now().isoformat(), token)
+            )
+            if cursor.rowcount != 1:
+                return None
+            return conn.execute('SELECT campaign_id, number, lang FROM candidates WHERE token = ?',
+                                (token,)).fetchone()
+
+    def link_status(self, token: str) -> Optional[str]:
+        """'used', 'ready', 'pending' (forms not generated yet), or None when there is no such link"""
+        row = self._connection().execute(
+            'SELECT claimed IS NOT NULL, forms IS NOT NULL FROM candidates WHERE token = ?', (token,)
+        ).fetchone()
+        if row is None:
+            return None
+        used, ready = row
+        return 'used' if used else 'ready' if ready else 'pending'
+
+    def start_section(self, campaign_id: int, number: int, section_type: str, test_id: str) -> str:
+        """
+        Records that a candidate started a section with a test, unless they
+        already had. Returns the ID of the test recorded for the section.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO sections (campaign_id, number, section_type, test_id, started) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (campaign_id, number, section_type, test_id, datetime.datetime.now().isoformat())
+            )
+            return conn.execute(
+                'SELECT test_id FROM sections WHERE campaign_id = ? AND number = ? AND section_type = ?',
+                (campaign_id, number, section_type)
+            ).fetchone()[0]
+
+    def complete_section(self, campaign_id: int, number: int, section_type: str):
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE sections SET completed = ? '
+                'WHERE campaign_id = ? AND number = ? AND section_type = ? AND completed IS NULL',
+                (datetime.datetime.now().isoformat(), campaign_id, number, section_type)
+            )
+
+    def started_sections(self, campaign_id: int, number: int) -> Dict[str, Tuple[str, bool]]:
+        """The sections a candidate started, with their test ID and whether it was completed"""
+        rows = self._connection().execute(
+            'SELECT section_type, test_id, completed IS NOT NULL FROM sections '
+            'WHERE campaign_id = ? AND number = ?', (campaign_id, number)
+        )
+        return {section_type: (test_id, bool(completed)) for section_type, test_id, completed in rows}
+
+    def load_section(self, campaign_id: int, number: int,
+                     section_type: str) -> Optional[Tuple[int, List[List[Any]]]]:
+        """The bank version and packed item references prepared for one section"""
+        row = self._connection().execute(
+            'SELECT forms FROM candidates WHERE campaign_id = ? AND number = ?', (campaign_id, number)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        forms = unpack_forms(row[0])
+        items = forms['sections'].get(section_type)
+        return None if items is None else (forms['bank'], items)
+
+
+def pregenerate(store: CampaignStore, campaign_id: int, test_manager_cls, workers: Optional[int] = None,
+                chunk_size: int = 1000, batch_size: int = 50,
+                report: Optional[Callable[[int, int, float], None]] = None) -> int:
+    """
+    Generates the forms of every candidate that has none yet, chunk by chunk.
+    Each chunk is committed before the next is started, so rerunning after an
+    interruption continues from the last chunk. report(done, total, rate) is
+    called after each chunk. Returns how many candidates were generated.
+    """
+    generated = 0
+    started = time.monotonic()
+    work = partial(generate_forms, test_manager_cls)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            chunk = store.pending(campaign_id, chunk_size)
+            if not chunk:
+                break
+            batches = [chunk[i:i + batch_size] for i in range(0, len(chunk), batch_size)]
+            for packed in pool.map(work, batches):
+                store.save_forms(campaign_id, packed)
+                generated += len(packed)
+            if report:
+                done, total = store.progress(campaign_id)
+                report(done, total, generated / max(time.monotonic() - started, 1e-9))
+    return generated
+
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings. SERVER_MODE picks how requests are served:
+
+    sync      (default) one request at a time per worker process; carries the
+              most candidates per GB when clients upload promptly
+    threaded  gthread workers; every worker process serves THREADS requests
+              at once, so a client that stalls mid-upload holds up one thread
+              instead of a whole process. Use it when many candidates are on
+              slow or flaky connections
+
+WEB_CONCURRENCY sets the number of worker processes. Compare the modes with
+loadtest.py.
+"""
+
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'sync')
+if SERVER_MODE not in ('threaded', 'sync'):
+    raise ValueError(f"SERVER_MODE must be 'threaded' or 'sync', not {SERVER_MODE!r}")
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+if SERVER_MODE == 'threaded':
+    worker_class = 'gthread'
+    threads = int(os.environ.get('THREADS', 8))
+else:
+    worker_class = 'sync'
@@ -0,0 +1,238 @@
+"""
+Load test comparing the serving modes of gunicorn.conf.py.
+
+Starts the app under gunicorn in each mode with throwaway stores, then runs
+simulated candidates against it: each one starts a section, autosaves a few
+answers with think time in between and submits. --slow-upload makes every
+answer upload take that long, as on a poor mobile connection. The number of candidates is
+doubled until the 95th percentile latency exceeds the target or requests fail.
+The last passing step is the mode's capacity, reported per GB of server memory
+(resident memory of the gunicorn master and workers).
+
+    python loadtest.py --modes sync threaded --workers 2 --threads 8 --slow-upload 0.2
+
+Clients run as threads of this process; on a small machine they compete with
+the server for CPU, so compare modes with each other rather than with production.
+"""
+
+from typing import Any, Dict, List, Optional
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SECTIONS = ['verbal', 'numerical', 'diagrammatic']
+
+TEST_ID = re.compile(r'let testId = "([0-9a-f]+)"')
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.sections = 0
+
+    def add(self, latency: Optional[float] = None, error: bool = False, section: bool = False):
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.errors += error
+            self.sections += section
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)] if ordered else 0.0
+
+
+def request(port: int, path: str, cookies: Dict[str, str], data: Dict[str, Any] = None,
+            slow_upload: float = 0.0) -> bytes:
+    """
+    One request with the candidate's cookies. A body is sent in two halves with
+    slow_upload seconds in between, so the server sees a slow connection.
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.putrequest('GET' if data is None else 'POST', path)
+        if cookies:
+            conn.putheader('Cookie', '; '.join(f'{name}={value}' for name, value in cookies.items()))
+        body = b'' if data is None else json.dumps(data).encode('utf-8')
+        if data is not None:
+            conn.putheader('Content-Type', 'application/json')
+            conn.putheader('Content-Length', str(len(body)))
+        conn.endheaders()
+        if body:
+            conn.send(body[:len(body) // 2])
+            time.sleep(slow_upload)
+            conn.send(body[len(body) // 2:])
+        response = conn.getresponse()
+        content = response.read()
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, value = header.split(';', 1)[0].partition('=')
+            cookies[name] = value
+        if response.status >= 400:
+            raise OSError(f"{path}: HTTP {response.status}")
+        return content
+    finally:
+        conn.close()
+
+
+def candidate(port: int, think: float, autosaves: int, slow_upload: float, stop: threading.Event,
+              stats: Stats):
+    """One simulated candidate taking sections until stopped"""
+    cookies: Dict[str, str] = {}
+    rng = random.Random()
+
+    def call(path: str, data: Dict[str, Any] = None) -> Optional[bytes]:
+        started = time.perf_counter()
+        try:
+            content = request(port, path, cookies, data, slow_upload)
+        except OSError:
+            stats.add(error=True)
+            return None
+        stats.add(latency=time.perf_counter() - started)
+        return content
+
+    # Spread the arrivals over the first think interval
+    stop.wait(rng.uniform(0, think))
+    while not stop.is_set():
+        page = call(f"/start_test/{rng.choice(SECTIONS)}")
+        match = page and TEST_ID.search(page.decode('utf-8'))
+        if not match:
+            stop.wait(think)
+            continue
+        for seq in range(1, autosaves + 1):
+            if stop.wait(think):
+                return
+            call('/autosave', {'test_id': match.group(1), 'seq': seq, 'changes': {str(seq - 1): 'A'}})
+        if stop.wait(think):
+            return
+        if call('/submit_test', {'answers': ['A'] * autosaves}) is not None:
+            stats.add(section=True)
+
+
+def server_rss(pid: int) -> int:
+    """Resident memory in bytes of a process and its children"""
+    total = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status', 'r') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        if int(entry) == pid or int(status.get('PPid', '0').strip()) == pid:
+            total += int(status.get('VmRSS', '0 kB').split()[0]) * 1024
+    return total
+
+
+def start_server(mode: str, workers: int, threads: int, port: int, data_dir: str) -> subprocess.Popen:
+    env = dict(os.environ,
+               SERVER_MODE=mode, WEB_CONCURRENCY=str(workers), THREADS=str(threads),
+               SECRET_KEY=secrets.token_hex(16),
+               ADMISSION_STORE=os.path.join(data_dir, 'admission.sqlite3'),
+               RESULTS_STORE=os.path.join(data_dir, 'results.sqlite3'),
+               TELEMETRY_STORE=os.path.join(data_dir, 'telemetry.sqlite3'),
+               CAMPAIGN_STORE=os.path.join(data_dir, 'campaigns.sqlite3'),
+               PROGRESS_STORE=os.path.join(data_dir, 'progress.sqlite3'),
+               # Every simulated candidate comes from the same address
+               RATE_LIMITS=json.dumps({'start_test': {'ip': None}, 'autosave': {'ip': None},
+                                       'submit_test': {'ip': None}}))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1).read()
+            return server
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"Server in {mode} mode did not start")
+
+
+def run_step(candidates: int, args) -> Stats:
+    stats = Stats()
+    stop = threading.Event()
+    clients = [threading.Thread(target=candidate, daemon=True,
+                                args=(args.port, args.think, args.autosaves, args.slow_upload, stop, stats))
+               for _ in range(candidates)]
+    for client in clients:
+        client.start()
+    time.sleep(args.duration)
+    stop.set()
+    for client in clients:
+        client.join(timeout=35)
+    return stats
+
+
+def measure(mode: str, args) -> Dict[str, Any]:
+    """Capacity of one serving mode: the largest passing step and its numbers"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = start_server(mode, args.workers, args.threads, args.port, data_dir)
+        try:
+            best = None
+            candidates = args.start
+            while candidates <= args.max_candidates:
+                stats = run_step(candidates, args)
+                step = {
+                    'candidates': candidates,
+                    'requests_per_s': len(stats.latencies) / args.duration,
+                    'sections': stats.sections,
+                    'p50_ms': stats.percentile(0.5) * 1000,
+                    'p95_ms': stats.percentile(0.95) * 1000,
+                    'errors': stats.errors,
+                    'rss_mb': server_rss(server.pid) / 2 ** 20
+                }
+                print(f"  {mode:>8} {candidates:>5} candidates: {step['requests_per_s']:7.1f} req/s, "
+                      f"p95 {step['p95_ms']:7.1f} ms, {step['errors']} errors, {step['rss_mb']:.0f} MB",
+                      file=sys.stderr)
+                if step['errors'] or step['p95_ms'] > args.p95_ms:
+                    break
+                best = step
+                candidates *= 2
+        finally:
+            server.terminate()
+            server.wait()
+    return {'mode': mode, 'capacity': best}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare concurrent-candidate capacity of the serving modes')
+    parser.add_argument('--modes', nargs='+', default=['sync', 'threaded'], choices=['sync', 'threaded'])
+    parser.add_argument('--workers', type=int, default=2, help='worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per worker in threaded mode')
+    parser.add_argument('--start', type=int, default=8, help='candidates in the first step')
+    parser.add_argument('--max-candidates', type=int, default=1024)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per step')
+    parser.add_argument('--think', type=float, default=2.0, help='seconds between a candidate\'s requests')
+    parser.add_argument('--autosaves', type=int, default=5, help='autosaves per section')
+    parser.add_argument('--slow-upload', type=float, default=0.0, help='seconds each answer upload takes')
+    parser.add_argument('--p95-ms', type=float, default=500.0, help='latency target')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'candidates':>10} {'req/s':>8} {'p95 ms':>8} {'RSS MB':>7} {'per GB':>7}")
+    for mode in args.modes:
+        capacity = measure(mode, args)['capacity']
+        if capacity is None:
+            print(f"{mode:>8} {'-':>10}  (the first step missed the latency target)")
+            continue
+        per_gb = capacity['candidates'] / (capacity['rss_mb'] / 1024)
+        print(f"{mode:>8} {capacity['candidates']:>10} {capacity['requests_per_s']:>8.1f} "
+              f"{capacity['p95_ms']:>8.1f} {capacity['rss_mb']:>7.0f} {per_gb:>7.0f}")
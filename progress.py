@@ -0,0 +1,82 @@
+"""
+Tests in progress.
+
+Every test a candidate starts is kept in a SQLite file shared by the workers,
+keyed by its test ID: the section, language, bank version and item references
+it was issued with, its start time and the answers and timings saved so far.
+The session cookie only names the test. Autosaved batches are merged here, one
+write transaction each, so batches that overlap on a slow network cannot undo
+each other, and a reloaded or crashed tab resumes the test with what was saved.
+Tests are dropped once no submission for them would be accepted any more.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ProgressStore:
+    """Tests in progress in a SQLite file shared by all worker processes"""
+
+    def __init__(self, path: str, keep_seconds: float):
+        self.path = path
+        self.keep_seconds = keep_seconds
+        self._local = threading.local()
+        self._ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            if not self._ready:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('CREATE TABLE IF NOT EXISTS tests (test_id TEXT PRIMARY KEY, started REAL, test TEXT)')
+                conn.execute('CREATE INDEX IF NOT EXISTS tests_started ON tests (started)')
+                conn.commit()
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def create(self, test: Dict[str, Any]):
+        """Stores a newly issued test (its 'id' is the key) and drops expired ones"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute('DELETE FROM tests WHERE started < ?', (now - self.keep_seconds,))
+            conn.execute('INSERT INTO tests (test_id, started, test) VALUES (?, ?, ?)',
+                         (test['id'], now, json.dumps(test, ensure_ascii=False)))
+
+    def get(self, test_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The test with an ID, or None when there is none (or it expired)"""
+        if not test_id:
+            return None
+        row = self._connection().execute('SELECT test FROM tests WHERE test_id = ?', (test_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def update(self, test_id: Optional[str], change: Callable[[Dict[str, Any]], Any]) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        Applies change(test) to a stored test and saves it, in one write
+        transaction, so concurrent updates of a test are applied one after the
+        other. Returns the changed test and what change returned; (None, None)
+        when there is no such test.
+        """
+        if not test_id:
+            return None, None
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT test FROM tests WHERE test_id = ?', (test_id,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None, None
+            test = json.loads(row[0])
+            value = change(test)
+            conn.execute('UPDATE tests SET test = ? WHERE test_id = ?', (json.dumps(test, ensure_ascii=False), test_id))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return test, value
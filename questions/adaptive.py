@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set, Tuple
+import math
+import random
+
+# Ability scale used for precomputed item information and EAP estimation
+THETA_MIN = -4.0
+THETA_MAX = 4.0
+THETA_STEP = 0.1
+THETA_GRID = [round(THETA_MIN + i * THETA_STEP, 1)
+              for i in range(int(round((THETA_MAX - THETA_MIN) / THETA_STEP)) + 1)]
+
+# Logistic scaling constant that makes the logistic model match the normal ogive
+SCALING = 1.7
+
+# Bank difficulty levels (1-3) mapped onto the IRT difficulty parameter
+DIFFICULTY_TO_B = {1: -1.0, 2: 0.0, 3: 1.0}
+DEFAULT_DIFFICULTY = 2
+
+
+@dataclass(frozen=True)
+class ItemParameters:
+    """
+    Three-parameter logistic (3PL) item parameters.
+    """
+    discrimination: float = 1.0
+    difficulty: float = 0.0
+    guessing: float = 0.25
+
+    @classmethod
+    def from_difficulty(cls, level: Optional[int], num_options: int = 4) -> 'ItemParameters':
+        """
+        Seeds IRT parameters from a bank item's 1-3 difficulty level.
+        The guessing parameter is the chance of picking the right option at random.
+        """
+        b = DIFFICULTY_TO_B.get(level or DEFAULT_DIFFICULTY, 0.0)
+        return cls(discrimination=1.0, difficulty=b, guessing=1.0 / max(num_options, 1))
+
+    def probability(self, theta: float) -> float:
+        """Probability of a correct response at ability theta"""
+        z = SCALING * self.discrimination * (theta - self.difficulty)
+        return self.guessing + (1.0 - self.guessing) / (1.0 + math.exp(-z))
+
+    def information(self, theta: float) -> float:
+        """Fisher information of the item at ability theta"""
+        p = self.probability(theta)
+        q = 1.0 - p
+        if p <= 0.0 or q <= 0.0:
+            return 0.0
+        scaled = (p - self.guessing) / (1.0 - self.guessing)
+        return (SCALING * self.discrimination) ** 2 * (q / p) * scaled ** 2
+
+
+class AdaptiveItemBank:
+    """
+    Item pool for computerized adaptive testing.
+
+    Item information is precomputed on THETA_GRID and, for every grid point,
+    item indices are kept sorted by information. Selecting the next item is then
+    a walk down one precomputed list that skips already administered items.
+    """
+
+    def __init__(self, items: List[Tuple[int, Dict[str, Any]]], exposure_top_k: int = 3):
+        self.item_ids = [item_id for item_id, _ in items]
+        self.parameters = [
+            ItemParameters.from_difficulty(data.get('difficulty'), len(data.get('options', [])) or 4)
+            for _, data in items
+        ]
+        self.exposure_top_k = exposure_top_k
+        self._index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+
+        # Response likelihoods on the grid, reused by every ability estimate
+        self._p_correct = [[params.probability(theta) for theta in THETA_GRID]
+                           for params in self.parameters]
+        self._by_information = []
+        for theta in THETA_GRID:
+            information = [params.information(theta) for params in self.parameters]
+            self._by_information.append(
+                sorted(range(len(self.parameters)), key=lambda i: information[i], reverse=True)
+            )
+
+        # Standard normal prior, stored in log form
+        self._log_prior = [-0.5 * theta * theta for theta in THETA_GRID]
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def index_of(self, item_id: int) -> int:
+        return self._index[item_id]
+
+    @staticmethod
+    def nearest_grid_index(theta: float) -> int:
+        """Returns the index of the grid point closest to theta"""
+        g = int(round((theta - THETA_MIN) / THETA_STEP))
+        return min(max(g, 0), len(THETA_GRID) - 1)
+
+    def select_next(self, theta: float, administered: Set[int], rng: random.Random) -> Optional[int]:
+        """
+        Returns the ID of the most informative item at theta that has not been
+        administered yet. To limit exposure of the single best item, the choice is
+        made at random (drawn from rng) among the top exposure_top_k candidates.
+        """
+        candidates = []
+        for i in self._by_information[self.nearest_grid_index(theta)]:
+            if self.item_ids[i] not in administered:
+                candidates.append(i)
+                if len(candidates) >= self.exposure_top_k:
+                    break
+        if not candidates:
+            return None
+        return self.item_ids[rng.choice(candidates)]
+
+    def estimate_ability(self, responses: List[Tuple[int, bool]]) -> Tuple[float, float]:
+        """
+        Expected a posteriori (EAP) ability estimate with a standard normal prior.
+        Returns the estimate and its posterior standard deviation (standard error).
+        """
+        log_posterior = list(self._log_prior)
+        for item_id, correct in responses:
+            p_row = self._p_correct[self._index[item_id]]
+            for g, p in enumerate(p_row):
+                log_posterior[g] += math.log(p if correct else 1.0 - p)
+
+        peak = max(log_posterior)
+        weights = [math.exp(value - peak) for value in log_posterior]
+        total = sum(weights)
+        theta = sum(w * t for w, t in zip(weights, THETA_GRID)) / total
+        variance = sum(w * (t - theta) ** 2 for w, t in zip(weights, THETA_GRID)) / total
+        return theta, math.sqrt(variance)
+
+
+class AdaptiveSession:
+    """
+    Stopping rules for an adaptive section.
+    A section ends once the standard error drops below target_se
+    (after at least min_items) or after max_items questions. An adaptive section
+    is never longer than a fixed one (5 questions); with four-option items seeded
+    from 1-3 difficulty levels the standard error is about 0.65 after five
+    answers, so a lower target would never end a section early.
+    """
+
+    def __init__(self, bank: AdaptiveItemBank, rng: random.Random, min_items: int = 3, max_items: int = 5,
+                 target_se: float = 0.65):
+        self.bank = bank
+        self.rng = rng
+        self.min_items = min_items
+        self.max_items = min(max_items, len(bank))
+        self.target_se = target_se
+
+    def first_item(self) -> Optional[int]:
+        return self.bank.select_next(0.0, set(), self.rng)
+
+    def next_item(self, responses: List[Tuple[int, bool]]) -> Tuple[Optional[int], float, float]:
+        """
+        Updates the ability estimate and returns the next item ID together with
+        theta and its standard error. The item ID is None when the section is over.
+        """
+        theta, se = self.bank.estimate_ability(responses)
+        count = len(responses)
+        if count >= self.max_items or (count >= self.min_items and se <= self.target_se):
+            return None, theta, se
+        return self.bank.select_next(theta, {item_id for item_id, _ in responses}, self.rng), theta, se
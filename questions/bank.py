@@ -0,0 +1,336 @@
+"""
+Versioned item banks.
+
+The items of all banks live in one data file, questions/data/bank.json, with a
+version number and the string tables their text is resolved through, so a
+version ships the text it was validated with. Publishing a version validates it and compiles it into a
+packed file (a fixed header with the version and a checksum, followed by the
+compact payload), which workers read through mmap:
+
+    python -m questions.bank --out-dir instance/banks
+
+Published versions stay on disk next to a CURRENT pointer file. Each worker
+checks the pointer between requests and swaps to a new version only once it
+has loaded and validated it; a broken version is rejected and the worker keeps
+serving the old one. Tests record the version they started with and keep using
+it until they finish.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from questions.localization import DEFAULT_LANGUAGE, StringTable
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'bank.json')
+
+POINTER_FILE = 'CURRENT'
+MAGIC = b'APTB'
+FORMAT_VERSION = 2
+# magic, format version, bank version, sha256 of the payload
+HEADER = struct.Struct('<4sHI32s')
+
+# Text every item of a category needs in the default language
+REQUIRED_STRINGS = {
+    ('verbal', 'relationships'): ['pair', 'options', 'correct', 'explanation'],
+    ('verbal', 'analogies'): ['question', 'options', 'correct', 'explanation'],
+    ('numerical', 'sequences'): ['explanation'],
+    ('numerical', 'number_relationships'): ['question', 'explanation'],
+    ('diagrammatic', 'sequences'): ['explanation'],
+    ('diagrammatic', 'matrices'): ['explanation']
+}
+
+# Question templates shared by the items of a section
+TEMPLATE_STRINGS = [
+    'verbal.relationship_question',
+    'numerical.sequence_question',
+    'diagrammatic.sequence_question',
+    'diagrammatic.matrix_question'
+]
+
+
+def next_number(step: Dict[str, Any], sequence: List[int], index: int) -> int:
+    """
+    Applies a numerical step rule to a sequence. Rules are data:
+    {'mul': m, 'add': a} gives x * m + a, {'pow': p} gives x ** p,
+    {'add_previous': true} adds the number before x (x itself at the start),
+    and {'cycle': [rule, ...]} applies the listed rules in turn.
+    """
+    if 'cycle' in step:
+        return next_number(step['cycle'][index % len(step['cycle'])], sequence, index)
+    x = sequence[-1]
+    if step.get('add_previous'):
+        return x + (sequence[-2] if len(sequence) > 1 else x)
+    if 'pow' in step:
+        return x ** step['pow']
+    return x * step.get('mul', 1) + step.get('add', 0)
+
+
+def _check_choice(item: Dict[str, Any]) -> List[str]:
+    options = item.get('options')
+    if not isinstance(options, list) or len(options) < 2:
+        return ['needs at least two options']
+    if item.get('correct') not in options:
+        return ['correct answer is not one of the options']
+    return []
+
+
+def _check_sequence_rule(item: Dict[str, Any]) -> List[str]:
+    start_range, steps = item.get('start_range'), item.get('steps')
+    if not (isinstance(start_range, list) and len(start_range) == 2
+            and all(isinstance(v, int) for v in start_range) and start_range[0] <= start_range[1]):
+        return ['start_range must be [low, high]']
+    if not isinstance(steps, int) or steps < 2:
+        return ['steps must be an integer of at least 2']
+    try:
+        for start in start_range:
+            sequence = [start]
+            for i in range(steps):
+                sequence.append(next_number(item['step'], sequence, i))
+            if not all(isinstance(v, int) for v in sequence):
+                return ['step must produce integers']
+    except (KeyError, TypeError, ZeroDivisionError):
+        return ['step is not a valid rule']
+    return []
+
+
+def _check_matrix(item: Dict[str, Any]) -> List[str]:
+    matrix = item.get('matrix')
+    if not (isinstance(matrix, list) and matrix and all(isinstance(row, list) for row in matrix)
+            and len({len(row) for row in matrix}) == 1):
+        return ['matrix must be a rectangular grid']
+    if sum(cell is None for row in matrix for cell in row) != 1:
+        return ['matrix must have exactly one missing cell']
+    return _check_choice(item)
+
+
+def intern_strings(value: Any) -> Any:
+    """
+    Interns the strings of decoded JSON, so the few distinct option values
+    (shapes, words, numbers) are shared by every item and test that uses them
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [intern_strings(v) for v in value]
+    if isinstance(value, dict):
+        return {k: intern_strings(v) for k, v in value.items()}
+    return value
+
+
+CHECKS: Dict[tuple, Callable[[Dict[str, Any]], List[str]]] = {
+    ('verbal', 'relationships'): lambda item: [],
+    ('verbal', 'analogies'): lambda item: [],
+    ('numerical', 'sequences'): _check_sequence_rule,
+    ('numerical', 'number_relationships'): _check_choice,
+    ('diagrammatic', 'sequences'): _check_choice,
+    ('diagrammatic', 'matrices'): _check_matrix
+}
+
+
+def validate_items(items: Dict[str, Dict[str, List[Dict[str, Any]]]], strings: StringTable) -> List[str]:
+    """Problems found in a bank's items and strings; an empty list means the bank can be published"""
+    errors = []
+    for key in TEMPLATE_STRINGS:
+        try:
+            strings.get(DEFAULT_LANGUAGE, key)
+        except KeyError:
+            errors.append(f"{key}: missing {DEFAULT_LANGUAGE} string")
+    for (section_type, question_type), check in CHECKS.items():
+        category = items.get(section_type, {}).get(question_type)
+        if not category:
+            errors.append(f"{section_type}.{question_type}: no items")
+            continue
+        seen = set()
+        for item in category:
+            item_id = item.get('id')
+            prefix = f"{section_type}.{question_type}.{item_id}"
+            if not isinstance(item_id, str) or item_id in seen:
+                errors.append(f"{prefix}: missing or duplicate id")
+                continue
+            seen.add(item_id)
+            if section_type != 'verbal' and 'difficulty' in item and item['difficulty'] not in (1, 2, 3):
+                errors.append(f"{prefix}: difficulty must be 1, 2 or 3")
+            errors.extend(f"{prefix}: {problem}" for problem in check(item))
+            for field in REQUIRED_STRINGS[(section_type, question_type)]:
+                try:
+                    strings.get(DEFAULT_LANGUAGE, f"{prefix}.{field}")
+                except KeyError:
+                    errors.append(f"{prefix}: missing {DEFAULT_LANGUAGE} string '{field}'")
+    return errors
+
+
+class Bank:
+    """One immutable version of all item banks and their string tables"""
+
+    def __init__(self, version: int, items: Dict[str, Dict[str, List[Dict[str, Any]]]],
+                 strings: Dict[str, Dict[str, Any]]):
+        self.version = version
+        self.items = intern_strings(items)
+        self.strings = StringTable(strings)
+
+    @classmethod
+    def from_source(cls, path: str = SOURCE_PATH) -> 'Bank':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['version'], data['banks'], data['strings'])
+
+    @classmethod
+    def from_packed(cls, path: str) -> 'Bank':
+        """Loads a compiled bank, rejecting truncated or corrupted files"""
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as packed:
+            if len(packed) < HEADER.size:
+                raise ValueError(f"{path}: not a compiled bank")
+            magic, file_format, version, digest = HEADER.unpack_from(packed)
+            if magic != MAGIC or file_format != FORMAT_VERSION:
+                raise ValueError(f"{path}: not a compiled bank")
+            payload = packed[HEADER.size:]
+        if hashlib.sha256(payload).digest() != digest:
+            raise ValueError(f"{path}: checksum mismatch")
+        data = json.loads(payload.decode('utf-8'))
+        return cls(version, data['banks'], data['strings'])
+
+    def pack(self) -> bytes:
+        payload = json.dumps({'banks': self.items, 'strings': self.strings.tables},
+                             ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        return HEADER.pack(MAGIC, FORMAT_VERSION, self.version, hashlib.sha256(payload).digest()) + payload
+
+
+def packed_name(version: int) -> str:
+    return f"bank-{version}.pack"
+
+
+def publish(bank: Bank, out_dir: str) -> str:
+    """
+    Validates a bank, writes its compiled file and points CURRENT at it.
+    Both files are replaced atomically, so workers never read a partial file.
+    """
+    errors = validate_items(bank.items, bank.strings)
+    if errors:
+        raise ValueError('Invalid bank:\n' + '\n'.join(errors))
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, packed_name(bank.version))
+    if os.path.exists(path) and Bank.from_packed(path).pack() != bank.pack():
+        raise ValueError(f"Version {bank.version} was already published with different items or strings")
+    for name, content in [(packed_name(bank.version), bank.pack()),
+                          (POINTER_FILE, packed_name(bank.version).encode('utf-8'))]:
+        temp = os.path.join(out_dir, f".{name}.tmp")
+        with open(temp, 'wb') as f:
+            f.write(content)
+        os.replace(temp, os.path.join(out_dir, name))
+    return path
+
+
+class BankRegistry:
+    """
+    The published bank versions of a directory. current is swapped to a new
+    version only after it loaded and passed validation (including the extra
+    validators, e.g. tenant overlays); older versions stay available by number
+    for the tests and prepared forms that reference them. Published versions are
+    reloaded from their files when they dropped out of memory; the fallback
+    shipped with the code has no file, so it is always kept.
+    """
+
+    def __init__(self, directory: str, fallback: Bank, check_interval: float = 2.0, keep_versions: int = 4):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.keep_versions = keep_versions
+        self.validators: List[Callable[[Bank], List[str]]] = []
+        self._lock = threading.Lock()
+        self._versions: 'OrderedDict[int, Bank]' = OrderedDict()
+        self._pointer_mtime = None
+        self._last_check = 0.0
+        self.fallback = fallback
+        self.current = fallback
+        self._remember(fallback)
+        self.refresh(force=True)
+
+    def _remember(self, bank: Bank):
+        with self._lock:
+            self._versions[bank.version] = bank
+            self._versions.move_to_end(bank.version)
+            while len(self._versions) > self.keep_versions:
+                oldest = next(iter(self._versions))
+                if oldest == self.current.version:
+                    self._versions.move_to_end(oldest)
+                    oldest = next(iter(self._versions))
+                self._versions.pop(oldest)
+
+    def get(self, version: Optional[int]) -> Optional[Bank]:
+        """The bank of a version, loading an older published file when it is not in memory"""
+        if version is None:
+            return self.current
+        with self._lock:
+            bank = self._versions.get(version)
+        if bank is None and version == self.fallback.version:
+            return self.fallback
+        if bank is None:
+            path = os.path.join(self.directory, packed_name(version))
+            try:
+                bank = Bank.from_packed(path)
+            except (OSError, ValueError):
+                return None
+            self._remember(bank)
+        return bank
+
+    def refresh(self, force: bool = False) -> Optional[str]:
+        """
+        Swaps to the version CURRENT points at, if it changed. Returns why a new
+        version was rejected, or None.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return None
+        self._last_check = now
+        pointer = os.path.join(self.directory, POINTER_FILE)
+        try:
+            mtime = os.path.getmtime(pointer)
+            if mtime == self._pointer_mtime:
+                return None
+            self._pointer_mtime = mtime
+            with open(pointer, 'r', encoding='utf-8') as f:
+                bank = Bank.from_packed(os.path.join(self.directory, f.read().strip()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            return str(e)
+        if bank.version == self.current.version:
+            return None
+
+        errors = validate_items(bank.items, bank.strings)
+        for validator in self.validators:
+            errors.extend(validator(bank))
+        if errors:
+            return f"Bank version {bank.version} rejected: " + '; '.join(errors)
+        self._remember(bank)
+        self.current = bank
+        return None
+
+
+# The version shipped with the code, used until a version is published
+DEFAULT_BANK = Bank.from_source()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate and publish a version of the item banks')
+    parser.add_argument('--source', default=SOURCE_PATH, help='bank data file')
+    parser.add_argument('--out-dir', default=os.path.join('instance', 'banks'), help='directory of published versions')
+    parser.add_argument('--check', action='store_true', help='only validate')
+    args = parser.parse_args()
+
+    bank = Bank.from_source(args.source)
+    errors = validate_items(bank.items, bank.strings)
+    if errors:
+        parser.exit(1, 'Invalid bank:\n' + '\n'.join(errors) + '\n')
+    if not args.check:
+        print(f"Published version {bank.version} to {publish(bank, args.out_dir)}")
+    else:
+        print(f"Version {bank.version} is valid")
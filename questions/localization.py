@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+
+DEFAULT_LANGUAGE = 'en'
+
+# Languages tried, in order, before the default language when a string is missing
+FALLBACKS: Dict[str, List[str]] = {
+    'sk': ['cs']
+}
+
+class StringTable:
+    """
+    Per-language string tables for the question banks.
+
+    Bank items are language-neutral and refer to their text by key
+    (e.g. 'numerical.sequences.add_3.explanation'). Each language is one flat
+    table in the bank data file, versioned with the items that use it, so
+    adding a language adds strings only.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, Any]]):
+        self.tables = tables
+
+    def fallback_chain(self, lang: str) -> List[str]:
+        """Languages to look a string up in, most specific first"""
+        chain = [lang] + FALLBACKS.get(lang, [])
+        if DEFAULT_LANGUAGE not in chain:
+            chain.append(DEFAULT_LANGUAGE)
+        return chain
+
+    def get(self, lang: str, key: str) -> Any:
+        """Returns the string for key in lang, following the fallback chain"""
+        for code in self.fallback_chain(lang):
+            table = self.tables.get(code)
+            if table is not None and key in table:
+                return table[key]
+        raise KeyError(f"Missing string: {key}")
+
+    def format(self, lang: str, key: str, *args, **kwargs) -> str:
+        return self.get(lang, key).format(*args, **kwargs)
+
+
+class StringOverlay(StringTable):
+    """
+    A tenant's strings layered over a shared table. Each language of the
+    fallback chain is looked up in the overrides first, then in the base table,
+    so the base tables are never copied.
+    """
+
+    def __init__(self, base: StringTable, overrides: Dict[str, Dict[str, Any]]):
+        self.base = base
+        self.overrides = overrides
+        self.tables = base.tables
+
+    def get(self, lang: str, key: str) -> Any:
+        for code in self.fallback_chain(lang):
+            for tables in (self.overrides, self.base.tables):
+                table = tables.get(code)
+                if table is not None and key in table:
+                    return table[key]
+        raise KeyError(f"Missing string: {key}")
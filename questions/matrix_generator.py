@@ -0,0 +1,287 @@
+"""
+Rule-based generator for 3x3 diagrammatic matrices.
+
+Every rule enumerates concrete, fully filled matrices. A puzzle is one of those
+matrices with a single cell blanked out. A puzzle is only accepted when every rule
+instance that agrees with the visible cells predicts the same missing symbol, and
+when enough plausible distractors remain that no rule would accept.
+Validation scans the whole hypothesis space, so puzzles are generated offline in
+a process pool and stored in a deduplicated JSON lines file. TestManager draws
+matrices from it alongside the hand-written ones; stored puzzles are numbered
+from GENERATED_BASE (see questions/records.py).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import random
+
+from questions.bank import intern_strings
+
+SIZE = 3
+
+# Symbol alphabet shared with the hand-written diagrammatic bank
+CYCLE_SYMBOLS = ['○', '□', '△', '◎', '⊕', '■', '▲', '●']
+OUTLINE_SHAPES = ['○', '□', '△']
+FILLED = {'○': '●', '□': '■', '△': '▲'}
+ROTATION_FAMILIES = [['△', '▷', '▽', '◁'], ['↑', '→', '↓', '←']]
+
+RULE_DIFFICULTY = {
+    'row_cycle': 1,
+    'column_cycle': 1,
+    'fill_rows': 2,
+    'fill_columns': 2,
+    'rotation': 2,
+    'additive': 3
+}
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'generated_matrices.jsonl')
+
+# Length of the id prefix that identifies a generated puzzle in item IDs
+SHORT_ID_LENGTH = 12
+
+Matrix = Tuple[Tuple[str, ...], ...]
+
+
+def _cycle_matrices(direction: int) -> List[Matrix]:
+    return [
+        tuple(tuple(symbols[(c + direction * r) % SIZE] for c in range(SIZE)) for r in range(SIZE))
+        for symbols in permutations(CYCLE_SYMBOLS, SIZE)
+    ]
+
+
+def _fill_matrices(by_rows: bool) -> List[Matrix]:
+    matrices = []
+    for shapes in permutations(OUTLINE_SHAPES, SIZE):
+        for parity in (0, 1):
+            matrices.append(tuple(
+                tuple(
+                    (FILLED[shapes[r if by_rows else c]] if (r + c + parity) % 2 else shapes[r if by_rows else c])
+                    for c in range(SIZE)
+                )
+                for r in range(SIZE)
+            ))
+    return matrices
+
+
+def _rotation_matrices() -> List[Matrix]:
+    matrices = []
+    for family in ROTATION_FAMILIES:
+        for start in range(4):
+            for row_step in (1, 2, 3):
+                for col_step in (1, 3):
+                    matrices.append(tuple(
+                        tuple(family[(start + r * row_step + c * col_step) % 4] for c in range(SIZE))
+                        for r in range(SIZE)
+                    ))
+    return matrices
+
+
+def _additive_matrices() -> List[Matrix]:
+    pairs = list(permutations(OUTLINE_SHAPES, 2))
+    return [
+        tuple((a, b, a + b) for a, b in rows)
+        for rows in permutations(pairs, SIZE)
+    ]
+
+
+@lru_cache(maxsize=None)
+def rule_matrices() -> Dict[str, Tuple[Matrix, ...]]:
+    """Every concrete matrix produced by each rule"""
+    rules = {
+        'row_cycle': lambda: _cycle_matrices(1),
+        'column_cycle': lambda: _cycle_matrices(-1),
+        'fill_rows': lambda: _fill_matrices(True),
+        'fill_columns': lambda: _fill_matrices(False),
+        'rotation': _rotation_matrices,
+        'additive': _additive_matrices
+    }
+    return {name: tuple(build()) for name, build in rules.items()}
+
+
+@lru_cache(maxsize=None)
+def hypothesis_space() -> Tuple[Matrix, ...]:
+    """All rule matrices in one flat tuple, scanned when validating a puzzle"""
+    return tuple(matrix for matrices in rule_matrices().values() for matrix in matrices)
+
+
+def consistent_answers(matrix: Matrix, hole: Tuple[int, int]) -> set:
+    """Symbols that any rule instance agreeing with the visible cells puts in the hole"""
+    answers = set()
+    for candidate in hypothesis_space():
+        if all(
+            candidate[r][c] == matrix[r][c]
+            for r in range(SIZE) for c in range(SIZE)
+            if (r, c) != hole
+        ):
+            answers.add(candidate[hole[0]][hole[1]])
+    return answers
+
+
+def plausible_distractors(matrix: Matrix, correct: str) -> set:
+    """Near misses: symbols from the grid, the other fill, neighbouring rotations and recombinations"""
+    candidates = {cell for row in matrix for cell in row}
+    for outline, filled in FILLED.items():
+        if correct == outline:
+            candidates.add(filled)
+        elif correct == filled:
+            candidates.add(outline)
+    for family in ROTATION_FAMILIES:
+        if correct in family:
+            i = family.index(correct)
+            candidates.update({family[(i + 1) % 4], family[(i + 2) % 4], family[(i - 1) % 4]})
+    if len(correct) == 2:
+        candidates.update({correct[::-1], correct[0], correct[1]})
+    candidates.discard(correct)
+    return candidates
+
+
+def puzzle_key(matrix: List[List[Optional[str]]]) -> str:
+    """Stable hash of a puzzle grid (with its hole), used for deduplication"""
+    return hashlib.sha1(json.dumps(matrix, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def generate_puzzle(rng: random.Random) -> Optional[Dict[str, Any]]:
+    """
+    Generates one validated puzzle, or returns None when the drawn candidate is
+    ambiguous or lacks enough plausible distractors.
+    """
+    rule = rng.choice(sorted(RULE_DIFFICULTY))
+    matrix = rng.choice(rule_matrices()[rule])
+    hole = (rng.randrange(SIZE), rng.randrange(SIZE))
+    correct = matrix[hole[0]][hole[1]]
+
+    answers = consistent_answers(matrix, hole)
+    if answers != {correct}:
+        return None
+    distractors = sorted(plausible_distractors(matrix, correct) - answers)
+    if len(distractors) < 3:
+        return None
+
+    options = [correct] + rng.sample(distractors, 3)
+    rng.shuffle(options)
+    grid = [[None if (r, c) == hole else matrix[r][c] for c in range(SIZE)] for r in range(SIZE)]
+    return {
+        'id': puzzle_key(grid),
+        'rule': rule,
+        'matrix': grid,
+        'options': options,
+        'correct': correct,
+        'difficulty': RULE_DIFFICULTY[rule]
+    }
+
+
+def generate_batch(seed: int, size: int) -> List[Dict[str, Any]]:
+    """Pool worker: generates up to size validated puzzles from its own seed"""
+    rng = random.Random(seed)
+    puzzles = []
+    for _ in range(size * 4):
+        puzzle = generate_puzzle(rng)
+        if puzzle is not None:
+            puzzles.append(puzzle)
+            if len(puzzles) >= size:
+                break
+    return puzzles
+
+
+class MatrixStore:
+    """
+    Deduplicated on-disk store of generated puzzles.
+    Puzzles are loaded once and indexed by difficulty, so a random draw is O(1).
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._puzzles: List[Dict[str, Any]] = []
+        self._by_difficulty: Dict[int, List[Dict[str, Any]]] = {}
+        self._by_short_id: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._index(intern_strings(json.loads(line)) for line in f if line.strip())
+
+    def _index(self, puzzles) -> List[Dict[str, Any]]:
+        added = []
+        for puzzle in puzzles:
+            if puzzle['id'][:SHORT_ID_LENGTH] in self._by_short_id:
+                continue
+            self._by_short_id[puzzle['id'][:SHORT_ID_LENGTH]] = puzzle
+            self._puzzles.append(puzzle)
+            self._by_difficulty.setdefault(puzzle['difficulty'], []).append(puzzle)
+            added.append(puzzle)
+        return added
+
+    def __len__(self) -> int:
+        return len(self._puzzles)
+
+    def count(self, difficulty: Optional[int] = None) -> int:
+        if difficulty is None:
+            return len(self._puzzles)
+        return len(self._by_difficulty.get(difficulty, []))
+
+    def get(self, index: int, difficulty: Optional[int] = None) -> Dict[str, Any]:
+        if difficulty is None:
+            return self._puzzles[index]
+        return self._by_difficulty[difficulty][index]
+
+    def find(self, short_id: str) -> Optional[Dict[str, Any]]:
+        """Looks a puzzle up by the id prefix used in item IDs"""
+        return self._by_short_id.get(short_id)
+
+    def add(self, puzzles: List[Dict[str, Any]]) -> int:
+        """Appends puzzles not yet in the store and returns how many were new"""
+        added = self._index(puzzles)
+        if added:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for puzzle in added:
+                    f.write(json.dumps(puzzle, ensure_ascii=False) + '\n')
+        return len(added)
+
+
+_STORE = None
+
+def get_matrix_store() -> MatrixStore:
+    """Returns the process-wide store, loading it on first use"""
+    global _STORE
+    if _STORE is None:
+        _STORE = MatrixStore()
+    return _STORE
+
+
+def pregenerate(count: int, workers: Optional[int] = None, path: str = DEFAULT_STORE_PATH,
+                seed: Optional[int] = None, batch_size: int = 50) -> int:
+    """
+    Fills the store with up to count new unique puzzles using a process pool.
+    Gives up after a few rounds without progress, when the rule space is exhausted.
+    """
+    store = MatrixStore(path)
+    root = random.Random(seed)
+    added = 0
+    stalled_rounds = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while added < count and stalled_rounds < 3:
+            batches = max(1, (count - added) // batch_size + 1)
+            seeds = [root.getrandbits(64) for _ in range(batches)]
+            new = 0
+            for puzzles in pool.map(generate_batch, seeds, [batch_size] * batches):
+                new += store.add(puzzles[:count - added - new])
+            added += new
+            stalled_rounds = 0 if new else stalled_rounds + 1
+    return added
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-generate diagrammatic matrix puzzles')
+    parser.add_argument('--count', type=int, default=500, help='number of new puzzles to add')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--path', default=DEFAULT_STORE_PATH, help='store file')
+    parser.add_argument('--seed', type=int, default=None, help='root seed for reproducible runs')
+    args = parser.parse_args()
+
+    added = pregenerate(args.count, args.workers, args.path, args.seed)
+    print(f"Added {added} puzzles to {args.path}")
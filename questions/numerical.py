@@ -1,249 +1,67 @@
 from dataclasses import dataclass
-from typing import List, Dict, Any, Callable, Tuple
+from typing import List, Dict, Any, Tuple
 import random
+import sys
+
+from questions.bank import next_number
+from questions.localization import StringTable
 
 class NumericalQuestions:
     """
-    Contains all numerical patterns and sequences for both English and Czech languages.
-    Each pattern includes a name, a function to generate the next number, and an explanation.
+    Contains all numerical patterns and sequences as language-neutral item records.
+    Each pattern includes an ID, a step rule producing the next number and its difficulty;
+    explanations live in the per-language string tables.
     """
     
-    QUESTIONS = {
-        'en': {
-            'sequences': [
-                # Basic arithmetic progressions
-                {
-                    'name': 'add_3',
-                    'generator': lambda x: x + 3,
-                    'start_range': (2, 10),
-                    'steps': 4,
-                    'explanation': 'Each number increases by 3',
-                    'difficulty': 1
-                },
-                {
-                    'name': 'add_5',
-                    'generator': lambda x: x + 5,
-                    'start_range': (1, 10),
-                    'steps': 4,
-                    'explanation': 'Each number increases by 5',
-                    'difficulty': 1
-                },
-                
-                # Multiplicative sequences
-                {
-                    'name': 'double',
-                    'generator': lambda x: x * 2,
-                    'start_range': (2, 6),
-                    'steps': 4,
-                    'explanation': 'Each number is doubled',
-                    'difficulty': 2
-                },
-                {
-                    'name': 'triple',
-                    'generator': lambda x: x * 3,
-                    'start_range': (1, 4),
-                    'steps': 4,
-                    'explanation': 'Each number is tripled',
-                    'difficulty': 2
-                },
-                
-                # More complex patterns
-                {
-                    'name': 'square',
-                    'generator': lambda x: x ** 2,
-                    'start_range': (2, 6),
-                    'steps': 4,
-                    'explanation': 'Each number is squared',
-                    'difficulty': 3
-                },
-                {
-                    'name': 'fibonacci_like',
-                    'generator': lambda x, prev: x + prev,
-                    'start_range': (1, 5),
-                    'steps': 4,
-                    'explanation': 'Each number is the sum of the two previous numbers',
-                    'difficulty': 3
-                },
-                
-                # Mixed operations
-                {
-                    'name': 'multiply_add',
-                    'generator': lambda x: x * 2 + 1,
-                    'start_range': (2, 5),
-                    'steps': 4,
-                    'explanation': 'Each number is doubled and then increased by 1',
-                    'difficulty': 2
-                },
-                {
-                    'name': 'alternate_operations',
-                    'generator': lambda x, index: x + 3 if index % 2 == 0 else x * 2,
-                    'start_range': (2, 5),
-                    'steps': 4,
-                    'explanation': 'Alternates between adding 3 and doubling the number',
-                    'difficulty': 3
-                }
-            ],
-            
-            'number_relationships': [
-                # Number pairs with relationships
-                {
-                    'pairs': [(2, 4), (3, 6), (4, 8)],
-                    'question': 'If the pattern continues, what number pairs with 5?',
-                    'options': ['10', '7', '9', '8'],
-                    'correct': '10',
-                    'explanation': 'Each second number is double the first number'
-                },
-                {
-                    'pairs': [(1, 1), (2, 4), (3, 9)],
-                    'question': 'If the pattern continues, what number pairs with 4?',
-                    'options': ['16', '12', '8', '6'],
-                    'correct': '16',
-                    'explanation': 'Each second number is the square of the first number'
-                }
-            ]
-        },
-        
-        'cs': {
-            'sequences': [
-                # Základní aritmetické posloupnosti
-                {
-                    'name': 'přičti_3',
-                    'generator': lambda x: x + 3,
-                    'start_range': (2, 10),
-                    'steps': 4,
-                    'explanation': 'Každé číslo se zvýší o 3',
-                    'difficulty': 1
-                },
-                {
-                    'name': 'přičti_5',
-                    'generator': lambda x: x + 5,
-                    'start_range': (1, 10),
-                    'steps': 4,
-                    'explanation': 'Každé číslo se zvýší o 5',
-                    'difficulty': 1
-                },
-                
-                # Násobné posloupnosti
-                {
-                    'name': 'dvojnásobek',
-                    'generator': lambda x: x * 2,
-                    'start_range': (2, 6),
-                    'steps': 4,
-                    'explanation': 'Každé číslo se vynásobí dvěma',
-                    'difficulty': 2
-                },
-                {
-                    'name': 'trojnásobek',
-                    'generator': lambda x: x * 3,
-                    'start_range': (1, 4),
-                    'steps': 4,
-                    'explanation': 'Každé číslo se vynásobí třemi',
-                    'difficulty': 2
-                },
-                
-                # Složitější vzorce
-                {
-                    'name': 'druhá_mocnina',
-                    'generator': lambda x: x ** 2,
-                    'start_range': (2, 6),
-                    'steps': 4,
-                    'explanation': 'Každé číslo se umocní na druhou',
-                    'difficulty': 3
-                },
-                {
-                    'name': 'fibonacci',
-                    'generator': lambda x, prev: x + prev,
-                    'start_range': (1, 5),
-                    'steps': 4,
-                    'explanation': 'Každé číslo je součtem dvou předchozích čísel',
-                    'difficulty': 3
-                },
-                
-                # Kombinované operace
-                {
-                    'name': 'násob_přičti',
-                    'generator': lambda x: x * 2 + 1,
-                    'start_range': (2, 5),
-                    'steps': 4,
-                    'explanation': 'Každé číslo se vynásobí dvěma a pak se přičte jedna',
-                    'difficulty': 2
-                },
-                {
-                    'name': 'střídavé_operace',
-                    'generator': lambda x, index: x + 3 if index % 2 == 0 else x * 2,
-                    'start_range': (2, 5),
-                    'steps': 4,
-                    'explanation': 'Střídá se přičtení trojky a násobení dvěma',
-                    'difficulty': 3
-                }
-            ],
-            
-            'number_relationships': [
-                # Vztahy mezi páry čísel
-                {
-                    'pairs': [(2, 4), (3, 6), (4, 8)],
-                    'question': 'Pokud vzorec pokračuje, jaké číslo patří k číslu 5?',
-                    'options': ['10', '7', '9', '8'],
-                    'correct': '10',
-                    'explanation': 'Každé druhé číslo je dvojnásobkem prvního čísla'
-                },
-                {
-                    'pairs': [(1, 1), (2, 4), (3, 9)],
-                    'question': 'Pokud vzorec pokračuje, jaké číslo patří k číslu 4?',
-                    'options': ['16', '12', '8', '6'],
-                    'correct': '16',
-                    'explanation': 'Každé druhé číslo je druhou mocninou prvního čísla'
-                }
-            ]
-        }
-    }
-
     @staticmethod
-    def generate_sequence(pattern: Dict[str, Any], lang: str = 'en') -> Tuple[str, List[str], str, str]:
+    def build_sequence(pattern: Dict[str, Any], start: int) -> List[int]:
         """
-        Generates a sequence based on the given pattern and returns the question,
-        options, correct answer, and explanation.
+        Builds the full sequence of a pattern from its start number; the last
+        number is the one the candidate has to find.
         """
-        start = random.randint(*pattern['start_range'])
         sequence = [start]
-        
-        # Generate sequence
         for i in range(pattern['steps']):
-            if 'prev' in pattern['generator'].__code__.co_varnames:
-                if i == 0:
-                    next_num = pattern['generator'](sequence[0], sequence[0])
-                else:
-                    next_num = pattern['generator'](sequence[-1], sequence[-2])
-            elif 'index' in pattern['generator'].__code__.co_varnames:
-                next_num = pattern['generator'](sequence[-1], i)
-            else:
-                next_num = pattern['generator'](sequence[-1])
-            sequence.append(next_num)
+            sequence.append(next_number(pattern['step'], sequence, i))
+        return sequence
+
+    @staticmethod
+    def draw_variant(pattern: Dict[str, Any],
+                     rng: random.Random) -> Tuple[Tuple[int, int, int], Tuple[int, ...]]:
+        """
+        Draws the random parts of a sequence question from rng: the variant (start
+        number and the offsets of two wrong options) and the order of the options.
+        """
+        variant = (rng.randint(*pattern['start_range']), rng.randint(1, 5), rng.randint(1, 5))
+        order = list(range(4))
+        rng.shuffle(order)
+        return variant, tuple(order)
+
+    @staticmethod
+    def build_question(pattern: Dict[str, Any], variant: Tuple[int, ...], order: Tuple[int, ...],
+                       lang: str, strings: StringTable) -> Tuple[str, List[str], str]:
+        """
+        Builds the question, options and correct answer of a sequence from a
+        variant drawn by draw_variant, with the options in the given order.
+        """
+        start, plus, minus = variant
+        sequence = NumericalQuestions.build_sequence(pattern, start)
         
         # Create question
-        if lang == 'en':
-            question = f"What comes next in the sequence: {', '.join(map(str, sequence[:-1]))}?"
-        else:
-            question = f"Jaké číslo následuje v posloupnosti: {', '.join(map(str, sequence[:-1]))}?"
-        
-        # Generate options
-        correct = str(sequence[-1])
-        wrong_options = [
-            str(sequence[-2] + random.randint(1, 5)),
-            str(sequence[-2] - random.randint(1, 5)),
-            str(int(sequence[-2] * 1.5))
-        ]
-        options = [correct] + wrong_options
-        random.shuffle(options)
+        question = strings.format(lang, 'numerical.sequence_question',
+                                  sequence=', '.join(map(str, sequence[:-1])))
         
-        return question, options, correct, pattern['explanation']
+        # Generate options; numbers repeat across tests, so their strings are shared
+        options = [sys.intern(str(n)) for n in
+                   (sequence[-1], sequence[-2] + plus, sequence[-2] - minus, int(sequence[-2] * 1.5))]
+        correct = options[0]
+        if order is not None:
+            options = [options[i] for i in order]
+        return question, options, correct
 
     @staticmethod
-    def get_random_sequence(lang: str = 'en', difficulty: int = None) -> Dict[str, Any]:
+    def get_explanation(pattern: Dict[str, Any], lang: str, strings: StringTable) -> str:
         """
-        Returns a random sequence pattern, optionally filtered by difficulty.
+        Returns the explanation of a sequence pattern in the specified language.
         """
-        sequences = NumericalQuestions.QUESTIONS[lang]['sequences']
-        if difficulty is not None:
-            sequences = [s for s in sequences if s['difficulty'] == difficulty]
-        return random.choice(sequences)
\ No newline at end of file
+        return strings.get(lang, f"numerical.sequences.{pattern['id']}.explanation")
+
@@ -0,0 +1,113 @@
+"""
+Compact test records.
+
+A test in progress is not stored as rendered questions. Each question is an
+ItemRef: the integer number of a bank item in the ItemTable of the test's bank
+version, the variant of items generated from a rule (a numerical sequence's
+start number and distractor offsets) and the order its options are shown in.
+Text, options and answers are only built from those at the edges, when a page
+is rendered, a submission scored or a result stored.
+
+Stock items are numbered in bank order, so the numbers do not depend on the
+tenant; a tenant's added items are numbered after them. Pre-generated matrices
+are numbered from GENERATED_BASE by their position in the append-only store.
+"""
+
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+import sys
+
+from questions.bank import Bank
+from questions.matrix_generator import SHORT_ID_LENGTH, get_matrix_store
+
+GENERATED_BASE = 1_000_000
+
+
+class ItemRecord(NamedTuple):
+    """A bank item with its number and the item ID used outside the process"""
+    number: int
+    section_type: str
+    question_type: str
+    item_id: str
+    data: Dict[str, Any]
+
+
+class ItemRef(NamedTuple):
+    """One question of a test: which item, which variant of it, in which option order"""
+    number: int
+    variant: Optional[Tuple[int, ...]] = None
+    order: Optional[Tuple[int, ...]] = None
+
+    def pack(self) -> List[Any]:
+        """JSON form for the session and stored forms: [number] or [number, variant, order]"""
+        if self.variant is None and self.order is None:
+            return [self.number]
+        return [self.number, self.variant and list(self.variant), self.order and list(self.order)]
+
+    @classmethod
+    def unpack(cls, data: List[Any]) -> 'ItemRef':
+        number, variant, order = (list(data) + [None, None])[:3]
+        return cls(number, variant and tuple(variant), order and tuple(order))
+
+
+class ItemKey(NamedTuple):
+    """What scoring and stored results need of an asked question"""
+    item_id: str
+    variant: Optional[int]
+    correct_answer: str
+
+
+class ItemTable:
+    """
+    Integer numbering of the items of one bank version, optionally seen
+    through a tenant's overlay (questions, as returned by Tenant.view). Also
+    holds the numbers each category samples from.
+    """
+
+    def __init__(self, bank: Bank, questions: Optional[Mapping] = None):
+        questions = bank.items if questions is None else questions
+        self.bank_version = bank.version
+        self.records: List[ItemRecord] = []
+        self._numbers: Dict[str, int] = {}
+
+        pools: Dict[Tuple[str, str], List[int]] = {}
+        added = []
+        for section_type, categories in bank.items.items():
+            for question_type, base in categories.items():
+                visible = {item['id']: item for item in questions[section_type][question_type]}
+                pool = pools[(section_type, question_type)] = []
+                for item in base:
+                    # Removed items keep their number (tests in progress may hold it) but are not drawn
+                    shown = visible.pop(item['id'], None)
+                    number = self._add(section_type, question_type, item if shown is None else shown)
+                    if shown is not None:
+                        pool.append(number)
+                added.extend((section_type, question_type, item) for item in visible.values())
+        # Additions come after every stock item, so stock numbers are the same for all tenants
+        for section_type, question_type, item in added:
+            pools[(section_type, question_type)].append(self._add(section_type, question_type, item))
+        self.pools: Dict[Tuple[str, str], Tuple[int, ...]] = {
+            category: tuple(numbers) for category, numbers in pools.items()
+        }
+
+    def _add(self, section_type: str, question_type: str, item: Dict[str, Any]) -> int:
+        number = len(self.records)
+        item_id = sys.intern(f"{section_type}.{question_type}.{item['id']}")
+        self.records.append(ItemRecord(number, section_type, question_type, item_id, item))
+        self._numbers[item_id] = number
+        return number
+
+    def record(self, number: int) -> ItemRecord:
+        """The item with a number; KeyError when there is no such item"""
+        if 0 <= number < len(self.records):
+            return self.records[number]
+        store = get_matrix_store()
+        if GENERATED_BASE <= number < GENERATED_BASE + len(store):
+            puzzle = store.get(number - GENERATED_BASE)
+            return ItemRecord(number, 'diagrammatic', 'matrices',
+                              f"diagrammatic.generated.{puzzle['id'][:SHORT_ID_LENGTH]}", puzzle)
+        raise KeyError(number)
+
+    def find(self, item_id: str) -> Optional[ItemRecord]:
+        """The stock or tenant item with an item ID ('section.type.key')"""
+        number = self._numbers.get(item_id)
+        return None if number is None else self.records[number]
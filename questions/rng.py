@@ -0,0 +1,67 @@
+"""
+Independent random streams for test generation.
+
+Generators never use the module-level random state; every call takes the
+random.Random it draws from (rng). Streams are spawned from a root seed the way
+numpy's SeedSequence does it: a stream's seed is a hash of the root entropy and
+its spawn key, the path of child indices (or names) leading to it. Streams with
+different keys are independent, the same key always gives the same stream, and
+any process or thread can spawn its own without sharing state with the others.
+"""
+
+from typing import Hashable, List, Optional, Tuple
+import hashlib
+import itertools
+import json
+import os
+import random
+import secrets
+import threading
+
+
+class SeedSequence:
+    """Root entropy plus a spawn key; spawns child sequences and seeds streams"""
+
+    def __init__(self, entropy: Optional[int] = None, spawn_key: Tuple[Hashable, ...] = ()):
+        self.entropy = secrets.randbits(128) if entropy is None else entropy
+        self.spawn_key = tuple(spawn_key)
+        self._spawned = itertools.count()
+
+    def child(self, *key: Hashable) -> 'SeedSequence':
+        """The child sequence with a given key, e.g. child('process', pid)"""
+        return SeedSequence(self.entropy, self.spawn_key + key)
+
+    def spawn(self, n: int) -> List['SeedSequence']:
+        """n new children, numbered after the ones spawned before (thread-safe)"""
+        return [self.child(next(self._spawned)) for _ in range(n)]
+
+    def seed(self, bits: int = 64) -> int:
+        """Seed of this sequence's stream, at most 64 bits"""
+        data = json.dumps([self.entropy, self.spawn_key], separators=(',', ':')).encode('utf-8')
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big') >> (64 - bits)
+
+    def rng(self) -> random.Random:
+        return random.Random(self.seed())
+
+
+class RandomStreams:
+    """
+    Hands out one independent stream per request (or task). Every process
+    spawns from its own child of the root, so forked workers that share the
+    root entropy still never draw the same numbers.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.root = SeedSequence(seed)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._process = None
+
+    def spawn(self) -> random.Random:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._process = self.root.child('process', pid)
+                    self._pid = pid
+        return self._process.spawn(1)[0].rng()
@@ -0,0 +1,186 @@
+"""
+Stored test results and their streaming export.
+
+Every finished section is written once to a SQLite file shared by the workers:
+the result returned to the browser plus item-level detail (item, answer,
+correctness and timings). Exports read the file in small batches ordered by
+result ID, so memory use does not grow with the number of results and no
+long-running read holds up the writers. The ID of the last exported result is
+the cursor a later export resumes after.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import csv
+import datetime
+import io
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from questions.records import ItemKey
+
+FORMATS = ['csv', 'ndjson']
+
+# CSV exports have one row per item; result columns repeat on each row
+CSV_COLUMNS = [
+    'id', 'completed', 'section_type', 'lang', 'mode', 'test_id', 'campaign', 'candidate',
+    'score', 'total', 'percentage', 'time_taken', 'late', 'fast_answers', 'theta', 'standard_error',
+    'item_index', 'item_id', 'variant', 'answer', 'correct_answer', 'correct',
+    'first_view_ms', 'first_answer_ms', 'last_change_ms'
+]
+
+
+def item_details(keys: List[ItemKey], answers: List[Any],
+                 timings: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    """Item-level detail of a test: what was asked, what was answered and when"""
+    items = []
+    for i, key in enumerate(keys):
+        answer = answers[i] if i < len(answers) else None
+        timing = (timings[i] if timings and i < len(timings) else None) or [None, None, None]
+        items.append({
+            'item_id': key.item_id,
+            'variant': key.variant,
+            'answer': answer,
+            'correct_answer': key.correct_answer,
+            'correct': answer == key.correct_answer,
+            'first_view_ms': timing[0],
+            'first_answer_ms': timing[1],
+            'last_change_ms': timing[2]
+        })
+    return items
+
+
+class ResultStore:
+    """Finished sections in a SQLite file shared by all worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            if not self._ready:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    'id INTEGER PRIMARY KEY AUTOINCREMENT, test_id TEXT UNIQUE, completed TEXT, '
+                    'section_type TEXT, lang TEXT, mode TEXT, campaign INTEGER, candidate INTEGER, '
+                    'result TEXT, items TEXT)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS results_completed ON results (completed)')
+                conn.commit()
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def record(self, test_id: str, section_type: str, lang: str, mode: str, result: Dict[str, Any],
+               items: List[Dict[str, Any]], candidate: Optional[Dict[str, int]] = None) -> bool:
+        """Stores a finished section once; returns False when the test was recorded before"""
+        candidate = candidate or {}
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO results '
+                '(test_id, completed, section_type, lang, mode, campaign, candidate, result, items) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (test_id, datetime.datetime.now().isoformat(timespec='seconds'), section_type, lang, mode,
+                 candidate.get('campaign'), candidate.get('number'),
+                 json.dumps(result, ensure_ascii=False), json.dumps(items, ensure_ascii=False))
+            )
+            return cursor.rowcount == 1
+
+    def get(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """The stored result of a finished section, or None"""
+        row = self._connection().execute('SELECT result FROM results WHERE test_id = ?', (test_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def iter_results(self, section_type: Optional[str] = None, lang: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None, after: int = 0,
+                     batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Yields stored results with an ID above after, oldest first, filtered by
+        section, language and completion time (ISO dates, until exclusive).
+        """
+        conditions = ['id > ?']
+        params: List[Any] = []
+        for column, op, value in [('section_type', '=', section_type), ('lang', '=', lang),
+                                  ('completed', '>=', since), ('completed', '<', until)]:
+            if value:
+                conditions.append(f'{column} {op} ?')
+                params.append(value)
+        query = (
+            'SELECT id, completed, section_type, lang, mode, test_id, campaign, candidate, result, items '
+            f"FROM results WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?"
+        )
+
+        conn = self._connection()
+        while True:
+            rows = conn.execute(query, [after] + params + [batch_size]).fetchall()
+            for row in rows:
+                yield {
+                    'id': row[0],
+                    'completed': row[1],
+                    'section_type': row[2],
+                    'lang': row[3],
+                    'mode': row[4],
+                    'test_id': row[5],
+                    'campaign': row[6],
+                    'candidate': row[7],
+                    'result': json.loads(row[8]),
+                    'items': json.loads(row[9])
+                }
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+
+def to_ndjson(results: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False) + '\n'
+
+
+def to_csv(results: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for result in results:
+        base = {key: value for key, value in result.items() if key not in ('result', 'items')}
+        base.update(result['result'])
+        for index, item in enumerate(result['items']):
+            writer.writerow(dict(base, item_index=index, **item))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def encode_stream(lines: Iterable[str], compress: bool = False, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Groups text into chunks of about chunk_size bytes, optionally gzip-compressed"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            chunk = b''.join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b''.join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_lines(results: Iterable[Dict[str, Any]], fmt: str) -> Iterator[str]:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return to_csv(results) if fmt == 'csv' else to_ndjson(results)
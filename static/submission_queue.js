@@ -0,0 +1,126 @@
+// Test submissions kept in IndexedDB until the server has answered them.
+// Loaded by the pages and by the service worker (templates/sw.js); either may send a
+// queued submission. Sending takes a short lease on it, so the two do not send it at
+// once, and the server answers a repeated submission with the result it stored first.
+const SubmissionQueue = (() => {
+    const DB_NAME = 'aptitude-test';
+    const STORE = 'submissions';
+    const SYNC_TAG = 'submissions';
+    const LEASE_MS = 30 * 1000;
+    const MAX_BACKOFF_MS = 5 * 60 * 1000;
+
+    function transaction(fn) {
+        // Runs fn(store, setResult) in one read-write transaction and resolves with the result it set
+        return new Promise((resolve, reject) => {
+            const open = indexedDB.open(DB_NAME, 1);
+            open.onupgradeneeded = () => open.result.createObjectStore(STORE, { keyPath: 'id' });
+            open.onerror = () => reject(open.error);
+            open.onsuccess = () => {
+                const db = open.result;
+                const tx = db.transaction(STORE, 'readwrite');
+                let result = null;
+                fn(tx.objectStore(STORE), value => { result = value; });
+                tx.oncomplete = () => { db.close(); resolve(result); };
+                tx.onerror = tx.onabort = () => { db.close(); reject(tx.error); };
+            };
+        });
+    }
+
+    function enqueue(id, url, payload) {
+        // A submission is stored before its first attempt, so a closed tab cannot lose it
+        return transaction(store => {
+            const request = store.get(id);
+            request.onsuccess = () => {
+                if (!request.result) {
+                    store.put({ id: id, url: url, body: JSON.stringify(payload), attempts: 0, nextAt: 0, leaseUntil: 0 });
+                }
+            };
+        });
+    }
+
+    function claim(id, force) {
+        // The entry, leased for sending; null while the other side holds it or, unless forced, before its retry is due
+        return transaction((store, setResult) => {
+            const request = store.get(id);
+            request.onsuccess = () => {
+                const entry = request.result;
+                const now = Date.now();
+                if (!entry || entry.leaseUntil > now || (!force && entry.nextAt > now)) {
+                    return;
+                }
+                entry.leaseUntil = now + LEASE_MS;
+                store.put(entry);
+                setResult(entry);
+            };
+        });
+    }
+
+    function backoff(attempts) {
+        // Exponential, with jitter so that clients cut off together do not all retry together
+        const ceiling = Math.min(1000 * 2 ** attempts, MAX_BACKOFF_MS);
+        return ceiling / 2 + Math.random() * ceiling / 2;
+    }
+
+    function release(entry, retryAfterMs, persisted) {
+        entry.attempts++;
+        entry.nextAt = Date.now() + Math.max(backoff(entry.attempts), retryAfterMs);
+        entry.leaseUntil = 0;
+        const outcome = { done: false, retryAt: entry.nextAt };
+        return persisted ? transaction(store => store.put(entry)).then(() => outcome, () => outcome) : outcome;
+    }
+
+    function send(entry, persisted) {
+        // Resolves with { done: true, body } once the server has answered for good, be it a result
+        // or a rejection a retry cannot fix; network errors, 408, 429 and 5xx leave the entry for a retry
+        return fetch(entry.url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: entry.body
+        })
+        .then(response => {
+            if (response.status === 408 || response.status === 429 || response.status >= 500) {
+                return release(entry, (parseFloat(response.headers.get('Retry-After')) || 0) * 1000, persisted);
+            }
+            return response.json()
+                .catch(() => ({ error: `HTTP ${response.status}` }))
+                .then(body => {
+                    const outcome = { done: true, body: body };
+                    return persisted ? transaction(store => store.delete(entry.id)).then(() => outcome, () => outcome) : outcome;
+                });
+        }, () => release(entry, 0, persisted));
+    }
+
+    return {
+        SYNC_TAG: SYNC_TAG,
+
+        // Queues a submission and sends it now. Resolves with { done: true, body } or with
+        // { done: false, retryAt } when it stays queued; call again at retryAt (or when back online).
+        submit(id, url, payload) {
+            return enqueue(id, url, payload)
+                .then(() => claim(id, true))
+                .then(entry => entry ? send(entry, true) : { done: false, retryAt: Date.now() + 2000 },
+                      // Without IndexedDB (some private windows) the submission is only retried while the page is open
+                      () => send({ id: id, url: url, body: JSON.stringify(payload), attempts: 0 }, false));
+        },
+
+        // Sends the queued submissions that are due (all of them when forced); resolves with the number left
+        drain(force) {
+            return transaction((store, setResult) => {
+                const request = store.getAllKeys();
+                request.onsuccess = () => setResult(request.result);
+            })
+            .then(ids => Promise.all(ids.map(id => claim(id, force).then(entry => entry ? send(entry, true) : { done: false }))))
+            .then(outcomes => outcomes.filter(outcome => !outcome.done).length);
+        },
+
+        // Lets the service worker send the queue when the connection returns, where Background Sync exists
+        requestSync() {
+            if (typeof navigator !== 'undefined' && navigator.serviceWorker && typeof window !== 'undefined') {
+                navigator.serviceWorker.ready
+                    .then(registration => registration.sync && registration.sync.register(SYNC_TAG))
+                    .catch(() => {});
+            }
+        }
+    };
+})();
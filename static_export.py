@@ -0,0 +1,142 @@
+"""
+Static export of pre-generated test forms.
+
+Each form is generated once by TestManager from its own seed and rendered into a
+standalone HTML page that any static host or CDN can serve. Pages only contain
+questions and options; the answer keys are written to a separate file that stays
+on the server, where the /score_form endpoint uses it to score submissions.
+"""
+
+from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import os
+import random
+
+from flask import render_template, session
+
+from questions.rng import SeedSequence
+
+SECTIONS = ['verbal', 'numerical', 'diagrammatic']
+
+
+def form_id_for(section_type: str, lang: str, seed: int) -> str:
+    """Stable, non-sequential form ID"""
+    digest = hashlib.sha256(f"{section_type}:{lang}:{seed}".encode('utf-8')).hexdigest()
+    return f"{section_type[0]}{lang}{digest[:12]}"
+
+
+def _content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:10]
+
+
+def _write(path: str, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+ENTRY_PAGE = """<!DOCTYPE html>
+<html lang="{lang}">
+<head>
+    <meta charset="UTF-8">
+    <meta http-equiv="Cache-Control" content="no-cache">
+    <script>
+        const forms = {forms};
+        window.location.replace(forms[Math.floor(Math.random() * forms.length)]);
+    </script>
+</head>
+<body></body>
+</html>
+"""
+
+
+def export_bundles(app, test_manager_cls, translations: Dict[str, Dict[str, Any]], out_dir: str,
+                   keys_path: str, forms_per_section: int = 20, score_url: str = '/score_form',
+                   seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Renders forms_per_section forms for every section and language into out_dir.
+
+    Layout of the bundle:
+        <lang>/<section>/index.html           entry page, redirects to a random form
+        <lang>/<section>/<form_id>.<hash>.html immutable form page
+        manifest.json                           all form pages by language and section
+    Answer keys go to keys_path, which must not be inside the published bundle.
+    Keys already in that file are kept, so forms of earlier exports still on the
+    CDN can be scored. Forms are drawn from seed (fresh entropy when None); the
+    seed reproduces the answer keys, so it must stay as private as they are.
+    Returns the manifest.
+    """
+    if os.path.abspath(keys_path).startswith(os.path.abspath(out_dir) + os.sep):
+        raise ValueError("Answer keys must be written outside the static bundle")
+
+    root = SeedSequence(seed)
+    manifest: Dict[str, Any] = {'forms': {}}
+    keys: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(keys_path):
+        with open(keys_path, 'r', encoding='utf-8') as f:
+            keys = json.load(f)
+
+    for lang in sorted(translations):
+        for section_type in SECTIONS:
+            pages: List[str] = []
+            for index in range(forms_per_section):
+                # Each form has its own stream, so forms do not depend on the ones exported before
+                form_seed = root.child(lang, section_type, index).seed()
+                form_id = form_id_for(section_type, lang, form_seed)
+
+                test_manager = test_manager_cls(lang, rng=random.Random(form_seed))
+                questions = test_manager.generate_test_section(section_type)
+                keys[form_id] = {
+                    'section_type': section_type,
+                    'lang': lang,
+                    'correct': [q.correct_answer for q in questions]
+                }
+
+                with app.test_request_context('/'):
+                    session['lang'] = lang
+                    html = render_template('test.html',
+                                           section_type=section_type,
+                                           questions=questions,
+                                           t=translations[lang],
+                                           static_bundle=True,
+                                           form_id=form_id,
+                                           submit_url=score_url,
+                                           home_url='index.html').encode('utf-8')
+
+                page = f"{form_id}.{_content_hash(html)}.html"
+                _write(os.path.join(out_dir, lang, section_type, page), html)
+                pages.append(page)
+
+            entry = ENTRY_PAGE.format(lang=lang, forms=json.dumps(pages))
+            _write(os.path.join(out_dir, lang, section_type, 'index.html'), entry.encode('utf-8'))
+            manifest['forms'].setdefault(lang, {})[section_type] = [
+                f"{lang}/{section_type}/{page}" for page in pages
+            ]
+
+    _write(os.path.join(out_dir, 'manifest.json'),
+           json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    _write(keys_path, json.dumps(keys, ensure_ascii=False).encode('utf-8'))
+    return manifest
+
+
+class FormKeys:
+    """
+    Answer keys of exported forms, loaded lazily and reloaded when the file changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = None
+        self._keys: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, form_id: str):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._keys = json.load(f)
+            self._mtime = mtime
+        return self._keys.get(form_id)
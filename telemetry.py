@@ -0,0 +1,162 @@
+"""
+Per-question response-time telemetry.
+
+The test page times three events per question with the browser's monotonic
+clock (performance.now): first view, first answer and last change. Events are
+sent along with the autosave batches as a flat list of integers,
+[question, kind, delta, question, kind, delta, ...], where delta is the time
+since the previous event of the batch (the first one counts from the start of
+the section) in TIME_UNIT_MS units.
+
+Merged timings are kept with the test in progress, and on submission every
+question feeds the per-item histograms. Histogram updates are buffered in
+process memory and written to a SQLite file shared by the workers in batches,
+so recording costs a dictionary update on the request path.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import bisect
+import os
+import sqlite3
+import threading
+import time
+
+# Resolution of the timings sent by the browser
+TIME_UNIT_MS = 100
+
+EVENT_VIEW = 0
+EVENT_CHANGE = 1
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+BUCKET_BOUNDS_MS = [1000, 2000, 3000, 5000, 8000, 13000, 21000, 34000, 55000, 89000, 144000]
+
+# A first answer given this soon after the question came into view counts as a fast guess
+FAST_GUESS_MS = 2000
+
+# Metrics recorded per item
+METRIC_FIRST_ANSWER = 'first_answer'
+METRIC_LAST_CHANGE = 'last_change'
+
+
+def decode_events(encoded: List[int]) -> List[Tuple[int, int, int]]:
+    """Decodes a delta-encoded batch into (question index, kind, time in ms) events"""
+    events = []
+    elapsed = 0
+    for i in range(0, len(encoded) - 2, 3):
+        index, kind, delta = encoded[i:i + 3]
+        elapsed += delta
+        events.append((index, kind, elapsed * TIME_UNIT_MS))
+    return events
+
+
+def merge_timing_events(timings: List[Optional[List[Optional[int]]]], encoded: Any) -> None:
+    """
+    Merges an encoded batch into per-question [first view, first answer, last change]
+    timings (ms since section start). Merging keeps minimums and maximums, so
+    replayed batches change nothing.
+    """
+    if not isinstance(encoded, list) or not all(isinstance(v, int) for v in encoded):
+        return
+    for index, kind, at in decode_events(encoded):
+        if not 0 <= index < len(timings):
+            continue
+        entry = timings[index] or [None, None, None]
+        if kind == EVENT_VIEW:
+            entry[0] = at if entry[0] is None else min(entry[0], at)
+        elif kind == EVENT_CHANGE:
+            entry[1] = at if entry[1] is None else min(entry[1], at)
+            entry[2] = at if entry[2] is None else max(entry[2], at)
+        timings[index] = entry
+
+
+def response_times(entry: Optional[List[Optional[int]]]) -> Dict[str, int]:
+    """Time to first answer and to last change, measured from first view"""
+    if not entry or entry[0] is None or entry[1] is None:
+        return {}
+    view, first, last = entry
+    return {
+        METRIC_FIRST_ANSWER: max(first - view, 0),
+        METRIC_LAST_CHANGE: max(last - view, 0)
+    }
+
+
+def is_fast_guess(entry: Optional[List[Optional[int]]]) -> bool:
+    times = response_times(entry)
+    return METRIC_FIRST_ANSWER in times and times[METRIC_FIRST_ANSWER] < FAST_GUESS_MS
+
+
+class TimingHistograms:
+    """
+    Per-item response-time histograms, buffered in memory and flushed to SQLite
+    every flush_interval seconds (by the request that notices it is due).
+    """
+
+    def __init__(self, path: str, flush_interval: float = 10.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str, int], int] = {}
+        self._last_flush = time.monotonic()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS item_timing ('
+            'item_id TEXT, metric TEXT, bucket INTEGER, count INTEGER, '
+            'PRIMARY KEY (item_id, metric, bucket))'
+        )
+        return conn
+
+    def record(self, item_id: str, entry: Optional[List[Optional[int]]]) -> None:
+        times = response_times(entry)
+        if not item_id or not times:
+            return
+        with self._lock:
+            for metric, ms in times.items():
+                key = (item_id, metric, bisect.bisect_left(BUCKET_BOUNDS_MS, ms))
+                self._pending[key] = self._pending.get(key, 0) + 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes buffered counts to the shared file"""
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        'INSERT INTO item_timing (item_id, metric, bucket, count) VALUES (?, ?, ?, ?) '
+                        'ON CONFLICT (item_id, metric, bucket) DO UPDATE SET count = count + excluded.count',
+                        [(item_id, metric, bucket, count) for (item_id, metric, bucket), count in pending.items()]
+                    )
+            except sqlite3.Error:
+                # Keep the counts for the next flush rather than losing them
+                with self._lock:
+                    for key, count in pending.items():
+                        self._pending[key] = self._pending.get(key, 0) + count
+        finally:
+            self._flush_lock.release()
+
+    def histogram(self, item_id: str, metric: str = METRIC_FIRST_ANSWER) -> List[int]:
+        """Counts per bucket for one item, including samples not flushed yet"""
+        counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        if os.path.exists(self.path):
+            with self._connect() as conn:
+                for bucket, count in conn.execute(
+                        'SELECT bucket, count FROM item_timing WHERE item_id = ? AND metric = ?',
+                        (item_id, metric)):
+                    counts[bucket] += count
+        with self._lock:
+            for (pending_item, pending_metric, bucket), count in self._pending.items():
+                if pending_item == item_id and pending_metric == metric:
+                    counts[bucket] += count
+        return counts
@@ -0,0 +1,87 @@
+// Service worker, rendered by the /sw.js route.
+// Assets are precached under versioned cache names and served from the cache; pages come from the
+// network with the cached shell as the offline fallback. Test submissions queued in IndexedDB
+// (static/submission_queue.js) are sent when the connection returns and before a new test starts.
+importScripts({{ queue_url | tojson }});
+
+const VERSION = {{ version | tojson }};
+// Tenants served under a path prefix have their own worker and caches
+const PREFIX = 'aptitude' + {{ request.script_root | tojson }} + '-';
+const SHELL_CACHE = `${PREFIX}shell-${VERSION}`;
+const ASSET_CACHE = `${PREFIX}assets-${VERSION}`;
+const SHELL = {{ shell | tojson }};
+const ASSETS = {{ assets | tojson }};
+// Starting a test replaces the one in the session, so these pages always come from the network
+const START_PATHS = {{ start_paths | tojson }};
+// How long a navigation waits for queued submissions before it goes ahead
+const DRAIN_TIMEOUT_MS = 5000;
+
+const assetUrls = new Set(ASSETS.map(asset => new URL(asset, self.location).href));
+const shellUrls = new Set(SHELL.map(page => new URL(page, self.location).href));
+
+self.addEventListener('install', event => {
+    event.waitUntil(Promise.all([
+        caches.open(ASSET_CACHE).then(cache => cache.addAll(ASSETS)),
+        caches.open(SHELL_CACHE).then(cache => cache.addAll(SHELL))
+    ]).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    // Only this version's caches are kept
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names
+            .filter(name => name.startsWith(PREFIX) && !name.endsWith(`-${VERSION}`))
+            .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+function offlinePage(request) {
+    return caches.match(request, { cacheName: SHELL_CACHE })
+        .then(cached => cached || caches.match(SHELL[0], { cacheName: SHELL_CACHE }));
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+
+    if (assetUrls.has(url.href)) {
+        event.respondWith(caches.match(request, { cacheName: ASSET_CACHE })
+            .then(cached => cached || fetch(request)));
+        return;
+    }
+    if (request.mode !== 'navigate') {
+        return;
+    }
+    if (START_PATHS.some(path => url.pathname.startsWith(path))) {
+        // A submission still queued must reach the server while its test is in the session
+        const drained = Promise.race([
+            SubmissionQueue.drain(true).catch(() => null),
+            new Promise(resolve => setTimeout(resolve, DRAIN_TIMEOUT_MS))
+        ]);
+        event.respondWith(drained.then(() => fetch(request)).catch(() => offlinePage(request)));
+        return;
+    }
+    event.respondWith(fetch(request)
+        .then(response => {
+            if (response.ok && shellUrls.has(url.href)) {
+                const copy = response.clone();
+                event.waitUntil(caches.open(SHELL_CACHE).then(cache => cache.put(request, copy)));
+            }
+            return response;
+        })
+        .catch(() => offlinePage(request)));
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === SubmissionQueue.SYNC_TAG) {
+        // Failing the event makes the browser try again later
+        event.waitUntil(SubmissionQueue.drain(false).then(left => {
+            if (left) {
+                throw new Error(`${left} submissions still queued`);
+            }
+        }));
+    }
+});
@@ -0,0 +1,234 @@
+"""
+Tenant overlays over the shared question banks.
+
+A tenant adds, removes or overrides items of the stock banks and may bring its
+own strings, layered over the strings of whichever bank version a test uses. Overlays are copy-on-write: a tenant keeps only its changes, and
+the item list of a bank category is only rebuilt for categories the tenant
+changes, sharing every untouched item with the base bank. Those lists are
+built on first use for each bank version and kept in a process-wide LRU
+cache, so memory stays bounded however many tenants are configured.
+
+Tenants are configured as JSON files, one per tenant (the file name is the
+tenant name):
+
+    {
+        "hosts": ["tests.acme.example"],
+        "items": {
+            "verbal": {
+                "analogies": {
+                    "add": [{"id": "acme_1"}],
+                    "remove": ["analogy_2"],
+                    "override": {"analogy_3": {"difficulty": 3}}
+                }
+            }
+        },
+        "strings": {"en": {"verbal.analogies.acme_1.question": "..."}}
+    }
+
+Requests are served for a tenant when they arrive on one of its hosts or
+under /t/<tenant>/.
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import threading
+
+from flask import g, request
+
+from questions.bank import CHECKS, REQUIRED_STRINGS, Bank
+from questions.localization import DEFAULT_LANGUAGE, StringOverlay, StringTable
+
+PATH_PREFIX = '/t/'
+
+# Tenant item lists kept in memory at most, across all tenants
+SAMPLING_INDEX_LIMIT = 256
+
+_INDEXES: 'OrderedDict[tuple, List[Dict[str, Any]]]' = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
+
+def apply_changes(base: List[Dict[str, Any]], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Item list of a category with a tenant's removals, overrides and additions applied"""
+    removed = set(changes.get('remove', []))
+    overrides = changes.get('override', {})
+    items = [
+        dict(item, **overrides[item['id']]) if item['id'] in overrides else item
+        for item in base if item['id'] not in removed
+    ]
+    return items + list(changes.get('add', []))
+
+
+def sampling_index(tenant: 'Tenant', bank: Bank, section_type: str, question_type: str) -> List[Dict[str, Any]]:
+    """The tenant's items of a bank category; the shared list itself when the tenant leaves it alone"""
+    base = bank.items[section_type][question_type]
+    changes = tenant.items.get(section_type, {}).get(question_type)
+    if not changes:
+        return base
+
+    key = (tenant.name, tenant.version, bank.version, section_type, question_type)
+    with _INDEX_LOCK:
+        items = _INDEXES.get(key)
+        if items is not None:
+            _INDEXES.move_to_end(key)
+            return items
+    items = apply_changes(base, changes)
+    with _INDEX_LOCK:
+        _INDEXES[key] = items
+        while len(_INDEXES) > SAMPLING_INDEX_LIMIT:
+            _INDEXES.popitem(last=False)
+    return items
+
+
+class _SectionView(Mapping):
+    def __init__(self, tenant: 'Tenant', bank: Bank, section_type: str):
+        self.tenant = tenant
+        self.bank = bank
+        self.section_type = section_type
+
+    def __getitem__(self, question_type: str) -> List[Dict[str, Any]]:
+        if question_type not in self.bank.items[self.section_type]:
+            raise KeyError(question_type)
+        return sampling_index(self.tenant, self.bank, self.section_type, question_type)
+
+    def __iter__(self):
+        return iter(self.bank.items[self.section_type])
+
+    def __len__(self) -> int:
+        return len(self.bank.items[self.section_type])
+
+
+class _BankView(Mapping):
+    """Drop-in for Bank.items as ItemTable reads it: section -> category -> tenant item list"""
+
+    def __init__(self, tenant: 'Tenant', bank: Bank):
+        self._sections = {section_type: _SectionView(tenant, bank, section_type) for section_type in bank.items}
+
+    def __getitem__(self, section_type: str) -> _SectionView:
+        return self._sections[section_type]
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+
+class Tenant:
+    """One client company's changes to the stock banks and strings"""
+
+    def __init__(self, name: str, hosts: List[str] = (), items: Dict[str, Any] = None,
+                 strings: Dict[str, Dict[str, Any]] = None):
+        self.name = name
+        self.hosts = list(hosts)
+        self.items = items or {}
+        self.version = hashlib.sha1(
+            json.dumps([self.items, strings], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:12]
+        self.strings = strings or {}
+
+    def view(self, bank: Bank) -> _BankView:
+        """The tenant's items over one bank version"""
+        return _BankView(self, bank)
+
+    def strings_for(self, bank: Bank) -> StringTable:
+        """The tenant's strings over those of one bank version"""
+        return StringOverlay(bank.strings, self.strings) if self.strings else bank.strings
+
+    def errors(self, bank: Bank) -> List[str]:
+        """Problems of the overlay over a bank version: unknown or clashing items, invalid additions, empty categories"""
+        errors = []
+        strings = self.strings_for(bank)
+        for section_type, categories in self.items.items():
+            for question_type, changes in categories.items():
+                prefix = f"Tenant {self.name}, {section_type}.{question_type}"
+                base = bank.items.get(section_type, {}).get(question_type)
+                if base is None:
+                    errors.append(f"{prefix}: unknown bank")
+                    continue
+                base_ids = {item['id'] for item in base}
+                unknown = (set(changes.get('remove', [])) | set(changes.get('override', {}))) - base_ids
+                if unknown:
+                    errors.append(f"{prefix}: unknown items {sorted(unknown)}")
+                for item in changes.get('add', []):
+                    if item.get('id') in base_ids:
+                        errors.append(f"{prefix}: added item {item.get('id')} exists in the base bank")
+                    errors.extend(f"{prefix}.{item.get('id')}: {problem}"
+                                  for problem in CHECKS[(section_type, question_type)](item))
+                    for field in REQUIRED_STRINGS[(section_type, question_type)]:
+                        try:
+                            strings.get(DEFAULT_LANGUAGE, f"{section_type}.{question_type}.{item.get('id')}.{field}")
+                        except KeyError:
+                            errors.append(f"{prefix}.{item.get('id')}: missing {DEFAULT_LANGUAGE} string '{field}'")
+                if not apply_changes(base, changes):
+                    errors.append(f"{prefix}: no items left")
+        return errors
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Tenant':
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls(name, config.get('hosts', []), config.get('items'), config.get('strings'))
+
+
+class _PathPrefix:
+    """WSGI middleware moving /t/<tenant> from the path to the script root, so url_for keeps it"""
+
+    def __init__(self, wsgi_app, registry: 'TenantRegistry'):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(PATH_PREFIX):
+            name, _, rest = path[len(PATH_PREFIX):].partition('/')
+            if name in self.registry.tenants:
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + PATH_PREFIX + name
+                environ['PATH_INFO'] = '/' + rest
+                environ['aptitude.tenant'] = name
+        return self.wsgi_app(environ, start_response)
+
+
+class TenantRegistry:
+    """
+    Flask extension resolving the tenant of each request (g.tenant, None for
+    the stock banks) from the path prefix or the host.
+    """
+
+    def __init__(self, directory: Optional[str] = None, bank: Optional[Bank] = None):
+        self.tenants: Dict[str, Tenant] = {}
+        self._hosts: Dict[str, Tenant] = {}
+        if directory and os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith('.json'):
+                    self.add(Tenant.from_file(os.path.join(directory, filename)))
+        if bank is not None:
+            errors = self.validate(bank)
+            if errors:
+                raise ValueError('Invalid tenant overlays:\n' + '\n'.join(errors))
+
+    def add(self, tenant: Tenant):
+        self.tenants[tenant.name] = tenant
+        for host in tenant.hosts:
+            self._hosts[host.lower()] = tenant
+
+    def validate(self, bank: Bank) -> List[str]:
+        """Problems of all overlays over a bank version, checked before a new version is used"""
+        return [error for tenant in self.tenants.values() for error in tenant.errors(bank)]
+
+    def get(self, name: Optional[str]) -> Optional[Tenant]:
+        return self.tenants.get(name) if name else None
+
+    def init_app(self, app):
+        app.wsgi_app = _PathPrefix(app.wsgi_app, self)
+        app.before_request(self.resolve)
+
+    def resolve(self):
+        tenant = self.get(request.environ.get('aptitude.tenant'))
+        if tenant is None:
+            tenant = self._hosts.get(request.host.split(':')[0].lower())
+        g.tenant = tenant